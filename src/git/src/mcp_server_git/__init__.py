@@ -2,12 +2,19 @@ import click
 from pathlib import Path
 import logging
 import sys
-from .server import serve
+from .server import DEFAULT_GIT_TIMEOUT, serve
 
 @click.command()
 @click.option("--repository", "-r", type=Path, help="Git repository path")
+@click.option(
+    "--timeout",
+    type=float,
+    default=DEFAULT_GIT_TIMEOUT,
+    show_default=True,
+    help="Seconds a tool call may run before its git subprocesses are killed",
+)
 @click.option("-v", "--verbose", count=True)
-def main(repository: Path | None, verbose: bool) -> None:
+def main(repository: Path | None, timeout: float, verbose: bool) -> None:
     """MCP Git Server - Git functionality for MCP"""
     import asyncio
 
@@ -18,7 +25,7 @@ def main(repository: Path | None, verbose: bool) -> None:
         logging_level = logging.DEBUG
 
     logging.basicConfig(level=logging_level, stream=sys.stderr)
-    asyncio.run(serve(repository))
+    asyncio.run(serve(repository, timeout))
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,18 @@
+import asyncio
+import json
 import logging
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import Sequence
+from typing import Any, Callable, Iterator, Literal, Sequence, TypeVar
 from mcp.server import Server
 from mcp.server.session import ServerSession
 from mcp.server.stdio import stdio_server
@@ -13,18 +25,54 @@ from mcp.types import (
 )
 from enum import Enum
 import git
+from git.refs.symbolic import SymbolicReference
 from pydantic import BaseModel
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Open repositories kept by RepoCache; each holds persistent `git cat-file` processes
+DEFAULT_REPO_CACHE_SIZE = 16
+# Threads running git work off the event loop, shared by all repositories
+DEFAULT_GIT_WORKERS = 8
+# Seconds a tool call may run before its git subprocesses are killed
+DEFAULT_GIT_TIMEOUT = 120.0
+# Bytes of diff output returned per page by the diff and show tools
+DEFAULT_DIFF_MAX_BYTES = 100_000
+# Newest commits whose metadata CommitIndex keeps in memory for each repository
+DEFAULT_INDEXED_COMMITS = 50_000
+# New commits that make CommitIndex extend the commit-graph file again
+COMMIT_GRAPH_BATCH = 1_000
+
+# git log --format fields; records start with RS and fields are separated by US, neither of
+# which git allows in names and which commit messages practically never contain
+LOG_FIELDS = ("hash", "parents", "author", "email", "date", "message")
+LOG_FORMAT = "%x1e" + "%x1f".join(("%H", "%P", "%an", "%ae", "%aI", "%B"))
+
+DiffMode = Literal["patch", "stat", "name-only"]
+DIFF_MODE_FLAGS: dict[str, list[str]] = {
+    "patch": [],
+    "stat": ["--stat"],
+    "name-only": ["--name-only"],
+}
+
 class GitStatus(BaseModel):
     repo_path: str
 
-class GitDiffUnstaged(BaseModel):
+class DiffOptions(BaseModel):
+    mode: DiffMode = "patch"
+    paths: list[str] | None = None
+    max_bytes: int = DEFAULT_DIFF_MAX_BYTES
+    offset: int = 0
+
+class GitDiffUnstaged(DiffOptions):
     repo_path: str
 
-class GitDiffStaged(BaseModel):
+class GitDiffStaged(DiffOptions):
     repo_path: str
 
-class GitDiff(BaseModel):
+class GitDiff(DiffOptions):
     repo_path: str
     target: str
 
@@ -39,9 +87,18 @@ class GitAdd(BaseModel):
 class GitReset(BaseModel):
     repo_path: str
 
-class GitLog(BaseModel):
-    repo_path: str
+class LogOptions(BaseModel):
     max_count: int = 10
+    skip: int = 0
+    revision_range: str | None = None
+    since: str | None = None
+    until: str | None = None
+    author: str | None = None
+    paths: list[str] | None = None
+
+class GitLog(LogOptions):
+    repo_path: str
+    output_format: Literal["text", "json"] = "text"
 
 class GitCreateBranch(BaseModel):
     repo_path: str
@@ -52,7 +109,7 @@ class GitCheckout(BaseModel):
     repo_path: str
     branch_name: str
 
-class GitShow(BaseModel):
+class GitShow(DiffOptions):
     repo_path: str
     revision: str
 
@@ -73,17 +130,471 @@ class GitTools(str, Enum):
     SHOW = "git_show"
     INIT = "git_init"
 
+# Tools that write to the repository, or read objects through its shared `git cat-file`
+# processes, which are not safe to use from two threads at once
+EXCLUSIVE_TOOLS = {
+    GitTools.COMMIT,
+    GitTools.ADD,
+    GitTools.RESET,
+    GitTools.CREATE_BRANCH,
+    GitTools.CHECKOUT,
+}
+
+def _kill(process: subprocess.Popen) -> None:
+    """Kill a git subprocess along with any hook or alias commands it spawned"""
+    if sys.platform == "win32":
+        process.kill()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+class GitHandle:
+    """Tracks the git subprocesses a running tool call has started so another thread can kill them"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._processes: set[subprocess.Popen] = set()
+        self.cancelled = False
+
+    @contextmanager
+    def attach(self, process: subprocess.Popen) -> Iterator[None]:
+        with self._lock:
+            if self.cancelled:
+                _kill(process)
+            self._processes.add(process)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._processes.discard(process)
+
+    def cancel(self) -> None:
+        """Kill every subprocess the call is running, and any it starts from now on"""
+        with self._lock:
+            self.cancelled = True
+            for process in self._processes:
+                _kill(process)
+
+_active_call = threading.local()
+
+@contextmanager
+def _track(process: subprocess.Popen) -> Iterator[subprocess.Popen]:
+    """Attach `process` to the GitHandle of the tool call running on this thread, if any"""
+    handle: GitHandle | None = getattr(_active_call, "handle", None)
+    if handle is None:
+        yield process
+        return
+    with handle.attach(process):
+        yield process
+
+def run_git(repo: git.Repo, *args: str) -> str:
+    """Run `git <args>` in the repository's working tree and return its output.
+
+    Unlike `repo.git`, the subprocess is tracked so a timed-out or cancelled call can kill it.
+    """
+    command = [git.Git.GIT_PYTHON_GIT_EXECUTABLE or "git", *args]
+    process = subprocess.Popen(
+        command,
+        cwd=repo.working_dir,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        # Its own process group, so cancelling also kills children that hold the pipes open
+        start_new_session=sys.platform != "win32",
+    )
+    with _track(process):
+        stdout, stderr = process.communicate()
+    if process.returncode != 0:
+        raise git.GitCommandError(command, process.returncode, stderr)
+    return stdout.decode("utf-8", errors="replace").removesuffix("\n")
+
+def _read_log(repo: git.Repo, args: Sequence[str]) -> list[dict[str, Any]]:
+    entries = []
+    for record in run_git(repo, "log", f"--format={LOG_FORMAT}", *args).split("\x1e")[1:]:
+        entry = dict(zip(LOG_FIELDS, record.split("\x1f", len(LOG_FIELDS) - 1)))
+        entry["parents"] = entry["parents"].split()
+        entry["message"] = entry["message"].rstrip("\n")
+        entries.append(entry)
+    return entries
+
+def _is_ancestor(repo: git.Repo, ancestor: str, descendant: str) -> bool:
+    try:
+        run_git(repo, "merge-base", "--is-ancestor", ancestor, descendant)
+    except git.GitCommandError:
+        # Exit status 1 means "no"; anything else (say, a pruned commit) also calls for a rebuild
+        return False
+    return True
+
+def _extends_linearly(new: list[dict[str, Any]], base: str) -> bool:
+    """Whether `new`, newest first, is a chain of single-parent commits on top of `base`.
+
+    Only then does `git log` list exactly `new` followed by the history of `base`; after a
+    merge it interleaves the merged commits with older ones by date.
+    """
+    parents = [entry["hash"] for entry in new[1:]] + [base]
+    return all(entry["parents"] == [parent] for entry, parent in zip(new, parents))
+
+class CommitIndex:
+    """Sidecar history index for one repository.
+
+    Keeps the metadata of the newest `max_commits` commits reachable from HEAD in memory, so
+    plain history browsing is answered without running git, in the same order as `git log`.
+    When HEAD moves forward by a linear chain of commits only those are read and put in front;
+    any other move, including a merge, rebuilds the table. The index also
+    keeps the repository's commit-graph file, with changed-path Bloom filters, extended in the
+    background, which speeds up the path, ancestry and merge-base queries git still answers.
+    """
+
+    def __init__(self, max_commits: int = DEFAULT_INDEXED_COMMITS):
+        self.max_commits = max(1, max_commits)
+        self._lock = threading.Lock()
+        self.head: str | None = None
+        self.entries: list[dict[str, Any]] = []
+        # Whether `entries` holds the whole history rather than its newest `max_commits`
+        self.complete = False
+        self._graph_writer: subprocess.Popen | None = None
+        self._graph_written = False
+        # Commits indexed since the commit-graph was last extended
+        self._graph_pending = 0
+
+    def refresh(self, repo: git.Repo) -> None:
+        """Bring the table up to date with the repository's current HEAD"""
+        try:
+            head = SymbolicReference.dereference_recursive(repo, "HEAD")
+        except ValueError:
+            head = None  # No commits yet
+        with self._lock:
+            if head == self.head and (head is not None or self.complete):
+                return
+            new = None
+            if head is not None and self.head is not None and _is_ancestor(repo, self.head, head):
+                new = _read_log(repo, [f"--max-count={self.max_commits}", f"{self.head}..{head}"])
+            if head is None:
+                entries, complete = [], True
+            elif new is not None and _extends_linearly(new, self.head):
+                logger.debug(f"Indexed {len(new)} new commits in {repo.working_dir}")
+                entries = new + self.entries
+                complete = self.complete and len(entries) <= self.max_commits
+                entries = entries[:self.max_commits]
+                self._graph_pending += len(new)
+            else:
+                logger.debug(f"Building commit index for {repo.working_dir}")
+                entries = _read_log(repo, [f"--max-count={self.max_commits}", head])
+                complete = len(entries) < self.max_commits
+                self._graph_pending += len(entries)
+            self.head, self.entries, self.complete = head, entries, complete
+            self._write_commit_graph(repo)
+
+    def _write_commit_graph(self, repo: git.Repo) -> None:
+        """Extend the commit-graph in the background on first use and after each batch of new commits"""
+        if self._graph_writer is not None:
+            if self._graph_writer.poll() is None:
+                return
+            if self._graph_writer.returncode != 0:
+                # Older git without --changed-paths, a read-only repository, ...; git log still works
+                logger.debug(f"git commit-graph write failed in {repo.working_dir}")
+            self._graph_writer = None
+        if not self.entries or (self._graph_written and self._graph_pending < COMMIT_GRAPH_BATCH):
+            return
+        self._graph_written = True
+        self._graph_pending = 0
+        self._graph_writer = subprocess.Popen(
+            [
+                git.Git.GIT_PYTHON_GIT_EXECUTABLE or "git",
+                "commit-graph", "write", "--reachable", "--split", "--changed-paths", "--no-progress",
+            ],
+            cwd=repo.working_dir,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=sys.platform != "win32",
+        )
+
+    def log(self, repo: git.Repo, options: LogOptions) -> list[dict[str, Any]] | None:
+        """Answer an unfiltered history query from the table, or return None if git must"""
+        if (
+            options.revision_range
+            or options.paths
+            or options.since
+            or options.until
+            or options.author
+            or options.skip < 0
+            or options.max_count < 0
+        ):
+            return None
+        self.refresh(repo)
+        with self._lock:
+            entries, complete = self.entries, self.complete
+        end = options.skip + options.max_count
+        if end > len(entries) and not complete:
+            return None
+        return entries[options.skip:end]
+
+    def close(self) -> None:
+        with self._lock:
+            writer, self._graph_writer = self._graph_writer, None
+        if writer is not None and writer.poll() is None:
+            # SIGTERM lets git remove its lock file
+            writer.terminate()
+            writer.wait()
+
+class RepoCache:
+    """LRU cache of open repositories, keyed by resolved path.
+
+    Reusing a `git.Repo` keeps its discovered `.git` directory, parsed config and persistent
+    `git cat-file` processes alive across tool calls. A cached repository is reopened when its
+    HEAD or index has been modified since it was opened, and evicted repositories are closed.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_REPO_CACHE_SIZE):
+        self.max_size = max(1, max_size)
+        self._lock = threading.Lock()
+        self._repos: OrderedDict[Path, tuple[git.Repo, tuple[int | None, ...]]] = OrderedDict()
+        self._repo_locks: dict[Path, threading.Lock] = {}
+        self._indexes: dict[Path, CommitIndex] = {}
+
+    def __len__(self) -> int:
+        return len(self._repos)
+
+    @staticmethod
+    def _stamp(repo: git.Repo) -> tuple[int | None, ...]:
+        stamp = []
+        for name in ("HEAD", "index"):
+            try:
+                stamp.append((Path(repo.git_dir) / name).stat().st_mtime_ns)
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    @staticmethod
+    def _key(repo_path: str | Path) -> Path:
+        return Path(repo_path).expanduser().resolve()
+
+    def lock(self, repo_path: str | Path) -> threading.Lock:
+        """The lock serializing exclusive tool calls on one repository"""
+        key = self._key(repo_path)
+        with self._lock:
+            return self._repo_locks.setdefault(key, threading.Lock())
+
+    def commit_index(self, repo_path: str | Path) -> CommitIndex:
+        """The history index kept for a repository while it stays in the cache.
+
+        Opens the repository first, so an invalid path raises instead of leaving an index behind.
+        """
+        self.get(repo_path)
+        key = self._key(repo_path)
+        with self._lock:
+            return self._indexes.setdefault(key, CommitIndex())
+
+    def _close(self, key: Path, repo: git.Repo) -> None:
+        # Wait for any exclusive call still using the repository's cat-file processes
+        with self.lock(key):
+            repo.close()
+
+    def _drop(self, key: Path, repo: git.Repo) -> None:
+        with self._lock:
+            index = self._indexes.pop(key, None) if key not in self._repos else None
+        if index is not None:
+            index.close()
+        self._close(key, repo)
+
+    def get(self, repo_path: str | Path) -> git.Repo:
+        """Return an open repository for `repo_path`, raising like `git.Repo()` if there is none"""
+        key = self._key(repo_path)
+        evicted = []
+        with self._lock:
+            cached = self._repos.get(key)
+            if cached is not None:
+                repo, stamp = cached
+                if self._stamp(repo) == stamp:
+                    self._repos.move_to_end(key)
+                    return repo
+                logger.debug(f"Reopening {key} after HEAD or index changed")
+                evicted.append((key, self._repos.pop(key)[0]))
+        for stale_key, stale in evicted:
+            self._close(stale_key, stale)
+
+        repo = git.Repo(key)
+        evicted = []
+        with self._lock:
+            current = self._repos.pop(key, None)
+            if current is not None:
+                evicted.append((key, current[0]))
+            self._repos[key] = (repo, self._stamp(repo))
+            while len(self._repos) > self.max_size:
+                stale_key, (stale, _) = self._repos.popitem(last=False)
+                evicted.append((stale_key, stale))
+        for stale_key, stale in evicted:
+            self._drop(stale_key, stale)
+        return repo
+
+    def close(self) -> None:
+        with self._lock:
+            repos = [(key, repo) for key, (repo, _) in self._repos.items()]
+            indexes = list(self._indexes.values())
+            self._repos.clear()
+            self._indexes.clear()
+        for index in indexes:
+            index.close()
+        for key, repo in repos:
+            self._close(key, repo)
+
+class GitWorkers:
+    """Runs blocking git work on a bounded thread pool so the event loop stays responsive.
+
+    Calls on different repositories, and non-exclusive calls on the same one, run concurrently;
+    exclusive calls hold the repository's lock. If a call exceeds `timeout` or its MCP request
+    is cancelled, the git subprocesses it started are killed and the caller gets the error
+    right away.
+    """
+
+    def __init__(
+        self,
+        repos: RepoCache,
+        max_workers: int = DEFAULT_GIT_WORKERS,
+        timeout: float | None = DEFAULT_GIT_TIMEOUT,
+    ):
+        self.repos = repos
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="git")
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _run_tracked(self, handle: GitHandle, func: Callable[..., T], *args: Any) -> T:
+        _active_call.handle = handle
+        try:
+            return func(*args)
+        finally:
+            _active_call.handle = None
+
+    def _in_repo(self, repo_path: Path, exclusive: bool, func: Callable[..., T], *args: Any) -> T:
+        repo = self.repos.get(repo_path)
+        if not exclusive:
+            return func(repo, *args)
+        with self.repos.lock(repo_path):
+            # The caller may have timed out or been cancelled while this call waited for the lock;
+            # it has already been told the call failed, so it must not go on to change the repository
+            handle: GitHandle | None = getattr(_active_call, "handle", None)
+            if handle is not None and handle.cancelled:
+                raise RuntimeError("Git call was cancelled while waiting for the repository lock")
+            return func(repo, *args)
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a blocking call on the worker pool, killing its git subprocesses on timeout or cancellation"""
+        handle = GitHandle()
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._run_tracked, handle, func, *args
+        )
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            handle.cancel()
+            raise TimeoutError(f"Git command exceeded the {self.timeout} second timeout") from None
+        except asyncio.CancelledError:
+            handle.cancel()
+            raise
+
+    async def run_in_repo(self, repo_path: Path, func: Callable[..., T], *args: Any, exclusive: bool = False) -> T:
+        """Call `func(repo, *args)` on the worker pool with the cached repository at `repo_path`"""
+        return await self.run(self._in_repo, repo_path, exclusive, func, *args)
+
+def read_git_page(
+    repo: git.Repo,
+    args: Sequence[str],
+    offset: int = 0,
+    max_bytes: int = DEFAULT_DIFF_MAX_BYTES,
+) -> tuple[str, int | None]:
+    """Stream `git <args>` and return about `max_bytes` of its output starting at byte `offset`.
+
+    Returns the page and the offset of the next one, or None once the output is exhausted.
+    Pages end on a line boundary, preferably at the start of a file's diff, and hold at least
+    one line. Output before `offset` is discarded as it is read and git is killed as soon as
+    the page is full, so memory stays bounded however large the diff is.
+    """
+    if offset < 0:
+        raise ValueError("offset must not be negative")
+    if max_bytes < 1:
+        raise ValueError("max_bytes must be positive")
+    command = [git.Git.GIT_PYTHON_GIT_EXECUTABLE or "git", *args]
+    process = subprocess.Popen(
+        command,
+        cwd=repo.working_dir,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=sys.platform != "win32",
+    )
+    lines: list[bytes] = []
+    # Bytes in the page so far, and where in it the last file's diff begins
+    size = file_start = 0
+    position = page_start = 0
+    next_offset = None
+    with _track(process):
+        assert process.stdout is not None
+        try:
+            for line in process.stdout:
+                start, position = position, position + len(line)
+                if start < offset:
+                    continue
+                is_file_header = line.startswith(b"diff --git ")
+                if not lines:
+                    page_start = start
+                elif size + len(line) > max_bytes:
+                    # Break before the last file's diff, unless that would leave less than half a page
+                    cut = size if is_file_header or file_start * 2 < max_bytes else file_start
+                    lines = lines[:_lines_within(lines, cut)]
+                    next_offset = page_start + cut
+                    break
+                elif is_file_header:
+                    file_start = size
+                lines.append(line)
+                size += len(line)
+        finally:
+            if next_offset is not None:
+                _kill(process)
+            _, stderr = process.communicate()
+    if next_offset is None and process.returncode != 0:
+        raise git.GitCommandError(command, process.returncode, stderr)
+    return b"".join(lines).decode("utf-8", errors="replace"), next_offset
+
+def _lines_within(lines: list[bytes], size: int) -> int:
+    """How many of `lines` fit in their first `size` bytes"""
+    total = 0
+    for count, line in enumerate(lines):
+        total += len(line)
+        if total > size:
+            return count
+    return len(lines)
+
+def _check_revision(revision: str) -> str:
+    """Refuse revisions git would parse as an option, such as `--output=<file>`"""
+    if revision.startswith("-"):
+        raise ValueError(f"Invalid revision: {revision}")
+    return revision
+
+def _diff_page(repo: git.Repo, args: list[str], options: DiffOptions) -> str:
+    args = [*args, "--no-color", "--no-ext-diff", *DIFF_MODE_FLAGS[options.mode]]
+    if options.paths:
+        args += ["--", *options.paths]
+    page, next_offset = read_git_page(repo, args, options.offset, options.max_bytes)
+    if next_offset is not None:
+        page += f"\n[Output truncated. Call again with offset={next_offset} to continue.]"
+    return page
+
 def git_status(repo: git.Repo) -> str:
-    return repo.git.status()
+    return run_git(repo, "status")
 
-def git_diff_unstaged(repo: git.Repo) -> str:
-    return repo.git.diff()
+def git_diff_unstaged(repo: git.Repo, options: DiffOptions | None = None) -> str:
+    return _diff_page(repo, ["diff"], options or DiffOptions())
 
-def git_diff_staged(repo: git.Repo) -> str:
-    return repo.git.diff("--cached")
+def git_diff_staged(repo: git.Repo, options: DiffOptions | None = None) -> str:
+    return _diff_page(repo, ["diff", "--cached"], options or DiffOptions())
 
-def git_diff(repo: git.Repo, target: str) -> str:
-    return repo.git.diff(target)
+def git_diff(repo: git.Repo, target: str, options: DiffOptions | None = None) -> str:
+    return _diff_page(repo, ["diff", _check_revision(target)], options or DiffOptions())
 
 def git_commit(repo: git.Repo, message: str) -> str:
     commit = repo.index.commit(message)
@@ -97,15 +608,39 @@ def git_reset(repo: git.Repo) -> str:
     repo.index.reset()
     return "All staged changes reset"
 
-def git_log(repo: git.Repo, max_count: int = 10) -> list[str]:
-    commits = list(repo.iter_commits(max_count=max_count))
+def git_log_entries(
+    repo: git.Repo,
+    options: LogOptions | None = None,
+    index: CommitIndex | None = None,
+) -> list[dict[str, Any]]:
+    """Read commit metadata from the commit index if it can answer the query, or otherwise from
+    a single `git log` process rather than loading each commit object"""
+    options = options or LogOptions()
+    if index is not None:
+        entries = index.log(repo, options)
+        if entries is not None:
+            return entries
+    args = [f"--max-count={options.max_count}", f"--skip={options.skip}"]
+    if options.since:
+        args.append(f"--since={options.since}")
+    if options.until:
+        args.append(f"--until={options.until}")
+    if options.author:
+        args.append(f"--author={options.author}")
+    if options.revision_range:
+        args.append(_check_revision(options.revision_range))
+    args.append("--")
+    args.extend(options.paths or ())
+    return _read_log(repo, args)
+
+def git_log(repo: git.Repo, options: LogOptions | None = None, index: CommitIndex | None = None) -> list[str]:
     log = []
-    for commit in commits:
+    for entry in git_log_entries(repo, options, index):
         log.append(
-            f"Commit: {commit.hexsha}\n"
-            f"Author: {commit.author}\n"
-            f"Date: {commit.authored_datetime}\n"
-            f"Message: {commit.message}\n"
+            f"Commit: {entry['hash']}\n"
+            f"Author: {entry['author']}\n"
+            f"Date: {datetime.fromisoformat(entry['date'])}\n"
+            f"Message: {entry['message']}\n"
         )
     return log
 
@@ -119,7 +654,7 @@ def git_create_branch(repo: git.Repo, branch_name: str, base_branch: str | None
     return f"Created branch '{branch_name}' from '{base.name}'"
 
 def git_checkout(repo: git.Repo, branch_name: str) -> str:
-    repo.git.checkout(branch_name)
+    run_git(repo, "checkout", branch_name)
     return f"Switched to branch '{branch_name}'"
 
 def git_init(repo_path: str) -> str:
@@ -129,30 +664,23 @@ def git_init(repo_path: str) -> str:
     except Exception as e:
         return f"Error initializing repository: {str(e)}"
 
-def git_show(repo: git.Repo, revision: str) -> str:
-    commit = repo.commit(revision)
-    output = [
-        f"Commit: {commit.hexsha}\n"
-        f"Author: {commit.author}\n"
-        f"Date: {commit.authored_datetime}\n"
-        f"Message: {commit.message}\n"
-    ]
-    if commit.parents:
-        parent = commit.parents[0]
-        diff = parent.diff(commit, create_patch=True)
-    else:
-        diff = commit.diff(git.NULL_TREE, create_patch=True)
-    for d in diff:
-        output.append(f"\n--- {d.a_path}\n+++ {d.b_path}\n")
-        output.append(d.diff.decode('utf-8'))
-    return "".join(output)
+def git_show(repo: git.Repo, revision: str, options: DiffOptions | None = None) -> str:
+    options = options or DiffOptions()
+    # Merges are diffed against their first parent, like the diff of any other commit
+    args = ["show", "-m", "--first-parent", "--format=Commit: %H%nAuthor: %an%nDate: %aI%nMessage: %B", _check_revision(revision)]
+    page = _diff_page(repo, args, options)
+    if options.offset == 0:
+        # Print the date as `str(datetime)`, like git_log and the GitPython-based git_show did
+        page = re.sub(r"^Date: (\d{4}-\d\d-\d\d)T", r"Date: \1 ", page, count=1, flags=re.MULTILINE)
+    return page
 
-async def serve(repository: Path | None) -> None:
-    logger = logging.getLogger(__name__)
+async def serve(repository: Path | None, timeout: float | None = DEFAULT_GIT_TIMEOUT) -> None:
+    repos = RepoCache()
+    workers = GitWorkers(repos, timeout=timeout)
 
     if repository is not None:
         try:
-            git.Repo(repository)
+            repos.get(repository)
             logger.info(f"Using repository at {repository}")
         except git.InvalidGitRepositoryError:
             logger.error(f"{repository} is not a valid Git repository")
@@ -241,7 +769,7 @@ async def serve(repository: Path | None) -> None:
             for root in roots_result.roots:
                 path = root.uri.path
                 try:
-                    git.Repo(path)
+                    await workers.run(repos.get, path)
                     repo_paths.append(str(path))
                 except git.InvalidGitRepositoryError:
                     pass
@@ -260,75 +788,84 @@ async def serve(repository: Path | None) -> None:
         
         # Handle git init separately since it doesn't require an existing repo
         if name == GitTools.INIT:
-            result = git_init(str(repo_path))
+            result = await workers.run(git_init, str(repo_path))
             return [TextContent(
                 type="text",
                 text=result
             )]
             
         # For all other commands, we need an existing repo
-        repo = git.Repo(repo_path)
+        async def run(func: Callable[..., T], *args: Any) -> T:
+            return await workers.run_in_repo(repo_path, func, *args, exclusive=name in EXCLUSIVE_TOOLS)
 
         match name:
             case GitTools.STATUS:
-                status = git_status(repo)
+                status = await run(git_status)
                 return [TextContent(
                     type="text",
                     text=f"Repository status:\n{status}"
                 )]
 
             case GitTools.DIFF_UNSTAGED:
-                diff = git_diff_unstaged(repo)
+                diff = await run(git_diff_unstaged, DiffOptions(**arguments))
                 return [TextContent(
                     type="text",
                     text=f"Unstaged changes:\n{diff}"
                 )]
 
             case GitTools.DIFF_STAGED:
-                diff = git_diff_staged(repo)
+                diff = await run(git_diff_staged, DiffOptions(**arguments))
                 return [TextContent(
                     type="text",
                     text=f"Staged changes:\n{diff}"
                 )]
 
             case GitTools.DIFF:
-                diff = git_diff(repo, arguments["target"])
+                diff = await run(git_diff, arguments["target"], DiffOptions(**arguments))
                 return [TextContent(
                     type="text",
                     text=f"Diff with {arguments['target']}:\n{diff}"
                 )]
 
             case GitTools.COMMIT:
-                result = git_commit(repo, arguments["message"])
+                result = await run(git_commit, arguments["message"])
                 return [TextContent(
                     type="text",
                     text=result
                 )]
 
             case GitTools.ADD:
-                result = git_add(repo, arguments["files"])
+                result = await run(git_add, arguments["files"])
                 return [TextContent(
                     type="text",
                     text=result
                 )]
 
             case GitTools.RESET:
-                result = git_reset(repo)
+                result = await run(git_reset)
                 return [TextContent(
                     type="text",
                     text=result
                 )]
 
             case GitTools.LOG:
-                log = git_log(repo, arguments.get("max_count", 10))
+                options = GitLog(**arguments)
+                index = await workers.run(repos.commit_index, repo_path)
+                if options.output_format == "json":
+                    entries = await run(git_log_entries, options, index)
+                    return [TextContent(
+                        type="text",
+                        text=json.dumps(entries, indent=2)
+                    )]
+                log = await run(git_log, options, index)
                 return [TextContent(
                     type="text",
                     text="Commit history:\n" + "\n".join(log)
                 )]
 
             case GitTools.CREATE_BRANCH:
-                result = git_create_branch(
-                    repo,
+                result = await run(
+                    git_create_branch,
                     arguments["branch_name"],
                     arguments.get("base_branch")
                 )
@@ -338,14 +875,14 @@ async def serve(repository: Path | None) -> None:
                 )]
 
             case GitTools.CHECKOUT:
-                result = git_checkout(repo, arguments["branch_name"])
+                result = await run(git_checkout, arguments["branch_name"])
                 return [TextContent(
                     type="text",
                     text=result
                 )]
 
             case GitTools.SHOW:
-                result = git_show(repo, arguments["revision"])
+                result = await run(git_show, arguments["revision"], DiffOptions(**arguments))
                 return [TextContent(
                     type="text",
                     text=result
@@ -355,5 +892,9 @@ async def serve(repository: Path | None) -> None:
                 raise ValueError(f"Unknown tool: {name}")
 
     options = server.create_initialization_options()
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, options, raise_exceptions=True)
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, options, raise_exceptions=True)
+    finally:
+        workers.close()
+        repos.close()
@@ -1,7 +1,26 @@
+import asyncio
+import os
+import time
 import pytest
 from pathlib import Path
 import git
-from mcp_server_git.server import git_checkout
+from mcp_server_git.server import (
+    CommitIndex,
+    DiffOptions,
+    GitWorkers,
+    LogOptions,
+    RepoCache,
+    git_checkout,
+    git_commit,
+    git_diff,
+    git_diff_unstaged,
+    git_log,
+    git_log_entries,
+    git_show,
+    git_status,
+    read_git_page,
+    run_git,
+)
 import shutil
 
 @pytest.fixture
@@ -27,4 +46,245 @@ def test_git_checkout_existing_branch(test_repository):
 def test_git_checkout_nonexistent_branch(test_repository):
 
     with pytest.raises(git.GitCommandError):
-        git_checkout(test_repository, "nonexistent-branch")
\ No newline at end of file
+        git_checkout(test_repository, "nonexistent-branch")
+
+def test_repo_cache_reuses_open_repositories(test_repository):
+    repos = RepoCache()
+    repo = repos.get(test_repository.working_dir)
+
+    assert repos.get(Path(test_repository.working_dir) / ".." / "temp_test_repo") is repo
+    assert len(repos) == 1
+
+def test_repo_cache_reopens_after_head_changes(test_repository):
+    repos = RepoCache()
+    repo = repos.get(test_repository.working_dir)
+    head = Path(test_repository.git_dir) / "HEAD"
+    head.touch()
+    os.utime(head, ns=(head.stat().st_atime_ns, head.stat().st_mtime_ns + 1_000_000))
+
+    assert repos.get(test_repository.working_dir) is not repo
+
+def test_repo_cache_evicts_least_recently_used(test_repository, tmp_path: Path):
+    repos = RepoCache(max_size=1)
+    first = repos.get(test_repository.working_dir)
+    git.Repo.init(tmp_path / "other")
+    repos.get(tmp_path / "other")
+
+    assert len(repos) == 1
+    assert repos.get(test_repository.working_dir) is not first
+
+def test_repo_cache_rejects_non_repositories(tmp_path: Path):
+    with pytest.raises(git.InvalidGitRepositoryError):
+        RepoCache().get(tmp_path)
+
+def test_git_workers_run_calls_off_the_event_loop(test_repository):
+    async def main():
+        workers = GitWorkers(RepoCache())
+        try:
+            return await asyncio.gather(
+                workers.run_in_repo(Path(test_repository.working_dir), git_status),
+                workers.run_in_repo(Path(test_repository.working_dir), git_checkout, "missing", exclusive=True),
+                return_exceptions=True,
+            )
+        finally:
+            workers.close()
+
+    status, checkout = asyncio.run(main())
+    assert "nothing to commit" in status
+    assert isinstance(checkout, git.GitCommandError)
+
+def test_git_workers_kill_timed_out_commands(test_repository):
+    test_repository.git.config("alias.slow", "!sleep 30")
+
+    async def main():
+        workers = GitWorkers(RepoCache(), timeout=0.5)
+        try:
+            await workers.run_in_repo(Path(test_repository.working_dir), run_git, "slow")
+        finally:
+            workers.close()
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        asyncio.run(main())
+    assert time.monotonic() - started < 10
+
+def test_git_workers_drop_exclusive_calls_that_time_out_waiting_for_the_lock(test_repository):
+    repos = RepoCache()
+    repo_path = Path(test_repository.working_dir)
+    head = test_repository.head.commit.hexsha
+    (repo_path / "test.txt").write_text("changed")
+    test_repository.index.add(["test.txt"])
+
+    async def main():
+        workers = GitWorkers(repos, timeout=0.5)
+        try:
+            with repos.lock(repo_path):
+                with pytest.raises(TimeoutError):
+                    await workers.run_in_repo(repo_path, git_commit, "late commit", exclusive=True)
+        finally:
+            workers.close()
+
+    asyncio.run(main())
+    assert git.Repo(repo_path).head.commit.hexsha == head
+
+def test_repo_cache_shares_one_lock_per_repository(test_repository):
+    repos = RepoCache()
+
+    assert repos.lock(test_repository.working_dir) is repos.lock(Path(test_repository.working_dir) / ".")
+
+@pytest.fixture
+def changed_repository(test_repository):
+    repo_path = Path(test_repository.working_dir)
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (repo_path / name).write_text("".join(f"{name} line {i}\n" for i in range(50)))
+    test_repository.index.add(["a.txt", "b.txt", "c.txt"])
+    test_repository.index.commit("add files")
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (repo_path / name).write_text("".join(f"{name} changed {i}\n" for i in range(50)))
+    return test_repository
+
+def test_read_git_page_pages_reassemble_the_full_output(changed_repository):
+    full = changed_repository.git.diff() + "\n"
+    pages = []
+    offset = 0
+    while offset is not None:
+        page, offset = read_git_page(changed_repository, ["diff"], offset=offset, max_bytes=2500)
+        assert len(page.encode()) <= 2500
+        pages.append(page)
+
+    assert len(pages) == 3
+    assert "".join(pages) == full
+    assert all(page.startswith("diff --git ") for page in pages)
+
+def test_git_diff_modes_and_path_filters(changed_repository):
+    stat = git_diff_unstaged(changed_repository, DiffOptions(mode="stat"))
+    names = git_diff(changed_repository, "HEAD", DiffOptions(mode="name-only", paths=["b.txt", "c.txt"]))
+
+    assert "3 files changed" in stat
+    assert names.split() == ["b.txt", "c.txt"]
+
+def test_git_diff_reports_truncation(changed_repository):
+    page = git_diff_unstaged(changed_repository, DiffOptions(max_bytes=200))
+
+    assert "Call again with offset=" in page
+
+def test_git_show_includes_header_and_patch(changed_repository):
+    shown = git_show(changed_repository, "HEAD", DiffOptions(paths=["a.txt"]))
+
+    assert shown.startswith(
+        f"Commit: {changed_repository.head.commit.hexsha}\n"
+        f"Author: {changed_repository.head.commit.author}\n"
+        f"Date: {changed_repository.head.commit.authored_datetime}\n"
+    )
+    assert "Message: add files" in shown
+    assert "+a.txt line 0" in shown
+    assert "b.txt" not in shown
+
+def test_read_git_page_raises_on_git_errors(test_repository):
+    with pytest.raises(git.GitCommandError):
+        read_git_page(test_repository, ["show", "no-such-revision"])
+
+def test_git_log_filters_and_pages_history(changed_repository):
+    entries = git_log_entries(changed_repository, LogOptions(max_count=1, skip=1))
+    touching_b = git_log_entries(changed_repository, LogOptions(paths=["b.txt"]))
+
+    assert [entry["message"] for entry in entries] == ["initial commit"]
+    assert entries[0]["parents"] == []
+    assert [entry["message"] for entry in touching_b] == ["add files"]
+    assert git_log_entries(changed_repository, LogOptions(revision_range="HEAD~1..HEAD"))[0]["hash"] == (
+        changed_repository.head.commit.hexsha
+    )
+    assert git_log_entries(changed_repository, LogOptions(author="nobody-by-this-name")) == []
+
+def test_git_log_formats_text_entries(test_repository):
+    commit = test_repository.head.commit
+    log = git_log(test_repository)
+
+    assert log == [
+        f"Commit: {commit.hexsha}\n"
+        f"Author: {commit.author}\n"
+        f"Date: {commit.authored_datetime}\n"
+        f"Message: initial commit\n"
+    ]
+
+def test_git_log_rejects_option_like_ranges(test_repository):
+    with pytest.raises(ValueError):
+        git_log_entries(test_repository, LogOptions(revision_range="--output=/tmp/x"))
+
+def test_commit_index_refreshes_incrementally(changed_repository):
+    index = CommitIndex()
+    assert [entry["message"] for entry in index.log(changed_repository, LogOptions())] == [
+        "add files",
+        "initial commit",
+    ]
+    indexed = index.entries[0]
+
+    changed_repository.index.add(["a.txt"])
+    changed_repository.index.commit("change a")
+    entries = git_log_entries(changed_repository, LogOptions(max_count=2), index)
+
+    assert [entry["message"] for entry in entries] == ["change a", "add files"]
+    assert entries[1] is indexed
+
+    changed_repository.git.reset("--hard", "HEAD~2")
+    assert [entry["message"] for entry in index.log(changed_repository, LogOptions())] == ["initial commit"]
+
+def test_commit_index_defers_to_git_when_it_cannot_answer(changed_repository):
+    index = CommitIndex(max_commits=1)
+
+    assert index.log(changed_repository, LogOptions(max_count=1)) is not None
+    assert index.log(changed_repository, LogOptions(max_count=2)) is None
+    assert index.log(changed_repository, LogOptions(paths=["a.txt"])) is None
+    assert len(git_log_entries(changed_repository, LogOptions(max_count=2), index)) == 2
+
+def test_commit_index_writes_commit_graph(test_repository):
+    index = CommitIndex()
+    index.refresh(test_repository)
+    index._graph_writer.wait()
+
+    assert (Path(test_repository.git_dir) / "objects" / "info" / "commit-graphs").is_dir()
+    index.close()
+
+def test_revisions_cannot_be_passed_as_options(test_repository, tmp_path: Path):
+    target = tmp_path / "pwned.txt"
+    with pytest.raises(ValueError):
+        git_show(test_repository, f"--output={target}")
+    with pytest.raises(ValueError):
+        git_diff(test_repository, f"--output={target}")
+
+    assert not target.exists()
+
+def test_commit_index_matches_git_order_after_a_merge(test_repository):
+    repo_path = Path(test_repository.working_dir)
+    main_branch = test_repository.active_branch.name
+    with test_repository.config_writer() as config:
+        config.set_value("user", "name", "Test")
+        config.set_value("user", "email", "test@example.com")
+
+    def commit(name: str, date: str) -> None:
+        (repo_path / f"{name}.txt").write_text(name)
+        test_repository.index.add([f"{name}.txt"])
+        test_repository.index.commit(name, author_date=date, commit_date=date)
+
+    test_repository.git.checkout("-b", "side")
+    commit("side-old", "2020-01-01T00:00:00")
+    test_repository.git.checkout(main_branch)
+    commit("main-old", "2020-01-02T00:00:00")
+    index = CommitIndex()
+    index.refresh(test_repository)
+
+    commit("main-new", "2020-01-04T00:00:00")
+    test_repository.git.merge("side", "--no-ff", "-m", "merge")
+    expected = [entry["hash"] for entry in git_log_entries(test_repository, LogOptions(max_count=100))]
+
+    assert [entry["hash"] for entry in index.log(test_repository, LogOptions(max_count=100))] == expected
+    assert [
+        entry["hash"] for entry in git_log_entries(test_repository, LogOptions(max_count=2, skip=2), index)
+    ] == expected[2:4]
+
+def test_commit_index_requires_a_repository(tmp_path: Path):
+    repos = RepoCache()
+    with pytest.raises(git.InvalidGitRepositoryError):
+        repos.commit_index(tmp_path)
+
+    assert repos._indexes == {}
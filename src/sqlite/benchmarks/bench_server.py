@@ -0,0 +1,228 @@
+"""Benchmark the SQLite MCP server's hot paths end to end.
+
+Generates a synthetic database, serves it with `create_server` and drives the real
+`call_tool` handler through an in-memory MCP client session, so every measurement includes
+request dispatch, query execution and result serialization. Reports latency percentiles,
+throughput and the peak RSS of the process for each scenario.
+
+    uv run python benchmarks/bench_server.py --rows 1000000 --iterations 500 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from mcp_server_sqlite.server import (
+    PRAGMA_PROFILES,
+    DatabaseRegistry,
+    SqliteDatabase,
+    create_server,
+    resolve_pragmas,
+)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STATUSES = ("open", "paid", "shipped", "cancelled")
+REGIONS = ("north", "south", "east", "west")
+
+Call = tuple[str, dict[str, Any]]
+
+
+def generate_database(path: Path, rows: int, seed: int) -> None:
+    """Create `customers` and `orders` tables with `rows` orders, unless the file already has them"""
+    conn = sqlite3.connect(path)
+    try:
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'orders'").fetchone():
+            return
+        rng = random.Random(seed)
+        customers = max(1, rows // 20)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT, region TEXT)")
+        conn.execute(
+            "CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER, status TEXT, total REAL, created_at TEXT)"
+        )
+        conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, kind TEXT, payload TEXT)")
+        conn.executemany(
+            "INSERT INTO customers VALUES (?, ?, ?)",
+            ((i, f"customer {i}", rng.choice(REGIONS)) for i in range(1, customers + 1)),
+        )
+        conn.executemany(
+            "INSERT INTO orders VALUES (?, ?, ?, ?, ?)",
+            (
+                (
+                    i,
+                    rng.randint(1, customers),
+                    rng.choice(STATUSES),
+                    round(rng.uniform(1, 500), 2),
+                    f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                )
+                for i in range(1, rows + 1)
+            ),
+        )
+        conn.execute("CREATE INDEX orders_customer ON orders (customer_id)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def scenarios(rows: int, rng: random.Random) -> dict[str, Callable[[], Call]]:
+    """Each scenario returns the next tool call to make"""
+    return {
+        "point_lookup": lambda: ("read_query", {
+            "query": "SELECT * FROM orders WHERE id = ?",
+            "params": [rng.randint(1, rows)],
+        }),
+        "join_lookup": lambda: ("read_query", {
+            "query": "SELECT o.id, o.total, c.name FROM orders o JOIN customers c ON c.id = o.customer_id WHERE o.customer_id = ?",
+            "params": [rng.randint(1, max(1, rows // 20))],
+        }),
+        "aggregate_scan": lambda: ("read_query", {
+            "query": "SELECT status, count(*) AS orders, sum(total) AS revenue FROM orders GROUP BY status",
+        }),
+        "page_records": lambda: ("read_query", {"query": "SELECT * FROM orders", "page_size": 1000}),
+        "page_columnar": lambda: ("read_query", {
+            "query": "SELECT * FROM orders",
+            "page_size": 1000,
+            "output_format": "columnar",
+        }),
+        "single_write": lambda: ("write_query", {
+            "query": "INSERT INTO events (kind, payload) VALUES (?, ?)",
+            "params": ["click", "x" * 64],
+        }),
+        "bulk_insert": lambda: ("bulk_insert", {
+            "table": "events",
+            "columns": ["kind", "payload"],
+            "rows": [["view", "y" * 64]] * 1000,
+        }),
+        "list_tables": lambda: ("list_tables", {}),
+        "describe_schema": lambda: ("describe_schema", {}),
+        "explain_query": lambda: ("explain_query", {"query": "SELECT * FROM orders WHERE customer_id = ?"}),
+    }
+
+
+def peak_rss_mib() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux but in bytes on macOS
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+async def run_scenario(session, next_call: Callable[[], Call], iterations: int, concurrency: int, warmup: int) -> dict[str, Any]:
+    for _ in range(warmup):
+        await session.call_tool(*next_call())
+
+    latencies: list[float] = []
+    errors = 0
+    remaining = iterations
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            name, arguments = next_call()
+            started = time.perf_counter()
+            result = await session.call_tool(name, arguments)
+            latencies.append((time.perf_counter() - started) * 1000)
+            text = result.content[0].text if result.content else ""
+            if result.isError or text.startswith(("Error:", "Database error:")):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "errors": errors,
+        "throughput_per_s": len(latencies) / elapsed,
+        "mean_ms": statistics.fmean(latencies),
+        "p50_ms": percentile(latencies, 0.50),
+        "p90_ms": percentile(latencies, 0.90),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": latencies[-1],
+        "peak_rss_mib": peak_rss_mib(),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, dict[str, Any]]:
+    directory = Path(args.db_dir) if args.db_dir else Path(tempfile.mkdtemp(prefix="sqlite-bench-"))
+    directory.mkdir(parents=True, exist_ok=True)
+    db_path = directory / f"bench-{args.rows}.db"
+    started = time.perf_counter()
+    generate_database(db_path, args.rows, args.seed)
+    print(f"Database {db_path} ready in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    db_options = {
+        "pool_size": args.pool_size,
+        "pragmas": resolve_pragmas(args.pragma_profile),
+        "result_cache_bytes": args.result_cache_bytes,
+    }
+    databases = DatabaseRegistry(SqliteDatabase(str(db_path), **db_options), **db_options)
+    available = scenarios(args.rows, random.Random(args.seed))
+    results = {}
+    try:
+        async with create_connected_server_and_client_session(create_server(databases)) as session:
+            for name in args.scenarios or list(available):
+                results[name] = await run_scenario(
+                    session, available[name], args.iterations, args.concurrency, args.warmup
+                )
+                print(f"{name}: done", file=sys.stderr)
+    finally:
+        databases.close()
+    return results
+
+
+def print_table(results: dict[str, dict[str, Any]]) -> None:
+    columns = ("calls", "errors", "throughput_per_s", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms", "peak_rss_mib")
+    width = max(len(name) for name in results) + 2
+    print("scenario".ljust(width) + "".join(column.rjust(17) for column in columns))
+    for name, result in results.items():
+        cells = (
+            f"{result[column]:.2f}" if isinstance(result[column], float) else str(result[column])
+            for column in columns
+        )
+        print(name.ljust(width) + "".join(cell.rjust(17) for cell in cells))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the SQLite MCP server through an in-memory MCP client")
+    parser.add_argument("--rows", type=int, default=100_000, help="Number of rows in the synthetic orders table")
+    parser.add_argument("--iterations", type=int, default=200, help="Measured calls per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured calls per scenario before measuring")
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent in-flight calls")
+    parser.add_argument("--scenarios", nargs="+", choices=list(scenarios(1, random.Random())), help="Scenarios to run (default all)")
+    parser.add_argument("--pool-size", type=int, default=4, help="Reader connections in the pool")
+    parser.add_argument("--pragma-profile", choices=sorted(PRAGMA_PROFILES), default="default")
+    parser.add_argument("--result-cache-bytes", type=int, default=0, help="Size of the read_query result cache (0 disables)")
+    parser.add_argument("--db-dir", help="Directory to keep generated databases in, so they are reused across runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON instead of a table")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
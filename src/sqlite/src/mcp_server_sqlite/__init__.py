@@ -1,6 +1,17 @@
 from . import server
 import asyncio
 import argparse
+import logging
+
+
+def _alias_pairs(parser, option, values):
+    pairs = {}
+    for value in values or []:
+        alias, separator, target = value.partition('=')
+        if not separator or not alias or not target:
+            parser.error(f'{option} expects ALIAS=VALUE, got {value!r}')
+        pairs[alias] = target
+    return pairs
 
 
 def main():
@@ -9,9 +20,116 @@ def main():
     parser.add_argument('--db-path', 
                        default="./sqlite_mcp_server.db",
                        help='Path to SQLite database file')
+    parser.add_argument('--attach',
+                       action='append',
+                       metavar='ALIAS=PATH',
+                       help='Also serve the database at PATH under ALIAS; may be repeated')
+    parser.add_argument('--attach-profile',
+                       action='append',
+                       metavar='ALIAS=PROFILE',
+                       help='PRAGMA profile for an --attach database (default: same PRAGMAs as --db-path)')
+    parser.add_argument('--read-only',
+                       action='store_true',
+                       help='Open the database as an immutable, memory-mapped snapshot and disable all write tools')
+    parser.add_argument('--pool-size',
+                       type=int,
+                       default=None,
+                       help='Maximum number of pooled reader connections '
+                            f'(default {server.DEFAULT_POOL_SIZE}, or {server.DEFAULT_READ_ONLY_POOL_SIZE} with --read-only)')
+    parser.add_argument('--cached-statements',
+                       type=int,
+                       default=server.DEFAULT_CACHED_STATEMENTS,
+                       help='Number of prepared statements cached per pooled connection')
+    parser.add_argument('--query-timeout',
+                       type=float,
+                       default=None,
+                       help='Abort queries running longer than this many seconds')
+    parser.add_argument('--pragma-profile',
+                       choices=sorted(server.PRAGMA_PROFILES),
+                       default=None,
+                       help="PRAGMA profile applied to every pooled connection (default 'default', or 'read-only' with --read-only)")
+    parser.add_argument('--journal-mode',
+                       choices=['WAL', 'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'OFF'],
+                       type=str.upper,
+                       help='Override the profile journal_mode')
+    parser.add_argument('--synchronous',
+                       choices=['OFF', 'NORMAL', 'FULL', 'EXTRA'],
+                       type=str.upper,
+                       help='Override the profile synchronous level')
+    parser.add_argument('--cache-size',
+                       type=int,
+                       help='Override the profile cache_size (pages, or KiB if negative)')
+    parser.add_argument('--mmap-size',
+                       type=int,
+                       help='Override the profile mmap_size in bytes')
+    parser.add_argument('--temp-store',
+                       choices=['DEFAULT', 'FILE', 'MEMORY'],
+                       type=str.upper,
+                       help='Override the profile temp_store')
+    parser.add_argument('--max-page-rows',
+                       type=int,
+                       default=server.DEFAULT_MAX_PAGE_ROWS,
+                       help='Upper bound on the number of rows read_query returns per page')
+    parser.add_argument('--max-result-bytes',
+                       type=int,
+                       default=server.DEFAULT_MAX_RESULT_BYTES,
+                       help='Approximate upper bound on the size of one read_query page')
+    parser.add_argument('--cursor-idle-timeout',
+                       type=float,
+                       default=server.DEFAULT_CURSOR_IDLE_TIMEOUT,
+                       help='Seconds after which an unused read_query cursor is released')
+    parser.add_argument('--result-cache-bytes',
+                       type=int,
+                       default=0,
+                       help='Cache single-page read_query results up to this many bytes in total (0 disables)')
+    parser.add_argument('--slow-query-ms',
+                       type=float,
+                       default=server.DEFAULT_SLOW_QUERY_MS,
+                       help='Record queries slower than this many milliseconds for the index advisor')
+    parser.add_argument('--data-dir',
+                       help='Directory import_file and export_query may read and write (default: the database directory)')
+    parser.add_argument('--slow-query-log',
+                       help='Append a JSON line for every slow query to this file')
     
     args = parser.parse_args()
-    asyncio.run(server.main(args.db_path))
+    if args.slow_query_log:
+        handler = logging.FileHandler(args.slow_query_log)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        server.slow_query_logger.addHandler(handler)
+
+    if args.pool_size is not None and args.pool_size < server.MIN_POOL_SIZE:
+        parser.error(f'--pool-size must be at least {server.MIN_POOL_SIZE}')
+
+    attach = _alias_pairs(parser, '--attach', args.attach)
+    attach_profiles = _alias_pairs(parser, '--attach-profile', args.attach_profile)
+    for alias, profile in attach_profiles.items():
+        if alias not in attach:
+            parser.error(f'--attach-profile names unknown database {alias!r}')
+        if profile not in server.PRAGMA_PROFILES:
+            parser.error(f'unknown PRAGMA profile {profile!r}')
+
+    asyncio.run(server.main(
+        args.db_path,
+        attach=attach,
+        attach_profiles=attach_profiles,
+        pool_size=args.pool_size,
+        cached_statements=args.cached_statements,
+        read_only=args.read_only,
+        query_timeout=args.query_timeout,
+        pragmas=server.resolve_pragmas(args.pragma_profile or ('read-only' if args.read_only else 'default'), {
+            'journal_mode': args.journal_mode,
+            'synchronous': args.synchronous,
+            'cache_size': args.cache_size,
+            'mmap_size': args.mmap_size,
+            'temp_store': args.temp_store,
+        }),
+        max_page_rows=args.max_page_rows,
+        max_result_bytes=args.max_result_bytes,
+        cursor_idle_timeout=args.cursor_idle_timeout,
+        result_cache_bytes=args.result_cache_bytes,
+        slow_query_ms=args.slow_query_ms,
+        data_dir=args.data_dir,
+    ))
 
 
 # Optionally expose other important items at package level
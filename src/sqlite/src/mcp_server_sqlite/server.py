@@ -1,11 +1,26 @@
 import os
 import sys
+import asyncio
 import sqlite3
 import logging
-from contextlib import closing
+import csv
+import functools
+import io
+import itertools
+import json
+import math
+import re
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
 from pathlib import Path
+from urllib.parse import parse_qs
 from pydantic import AnyUrl
-from typing import Any
+from typing import Any, Callable, Hashable, Iterable, Iterator, Sequence, TypeVar
 
 from mcp.server import InitializationOptions
 from mcp.server.lowlevel import Server, NotificationOptions
@@ -20,6 +35,8 @@ if sys.platform == "win32" and os.environ.get('PYTHONIOENCODING') is None:
     sys.stderr.reconfigure(encoding="utf-8")
 
 logger = logging.getLogger('mcp_sqlite_server')
+# One JSON line per query slower than --slow-query-ms; --slow-query-log sends these to a file
+slow_query_logger = logging.getLogger('mcp_sqlite_server.slow_queries')
 logger.info("Starting MCP SQLite Server")
 
 PROMPT_TEMPLATE = """
@@ -40,8 +57,20 @@ This server provides several SQL-related tools:
 "read_query": Executes SELECT queries to read data from the database
 "write_query": Executes INSERT, UPDATE, or DELETE queries to modify data
 "create_table": Creates new tables in the database
+"bulk_insert": Inserts many rows into a table in a single transaction
+"import_file": Loads a local CSV or JSONL file into a table
+"export_query": Writes the result of a SELECT query to a local CSV or JSONL file
+"execute_batch": Runs several write statements atomically in one transaction
 "list_tables": Shows all existing tables
 "describe_table": Shows the schema for a specific table
+"describe_schema": Shows every table with its columns, indexes, foreign keys and row counts at once
+"explain_query": Shows how SQLite will execute a query, flagging full table scans
+"suggest_indexes": Suggests, and optionally creates, indexes for scanning or slow queries
+"create_materialized_view": Stores a query's result, such as a GROUP BY rollup, in a table that refresh_view keeps up to date
+"refresh_view": Brings materialized views up to date, incrementally where possible
+"create_fts_index": Builds a full-text search index over text columns of a table
+"search_text": Finds the rows of a table that best match search terms, with highlighted snippets
+"sample_query": Estimates COUNT, SUM and AVG with error bounds from a sample of a large table
 "append_insight": Adds a new business insight to the memo resource
 </mcp>
 <demo-instructions>
@@ -64,7 +93,7 @@ a. Instead of asking about the data that is required for the scenario, just go a
 b. Design a set of table schemas that represent the data needed for the business problem.
 c. Include at least 2-3 tables with appropriate columns and data types.
 d. Leverage the tools to create the tables in the SQLite database.
-e. Create INSERT statements to populate each table with relevant synthetic data.
+e. Populate each table with relevant synthetic data, using bulk_insert to load all rows of a table in one call.
 f. Ensure the data is diverse and representative of the business problem.
 g. Include at least 10-15 rows of data for each table.
 
@@ -85,6 +114,7 @@ a. Now that we have all the data and queries, it's time to create a dashboard, u
 b. Use a variety of visualizations such as tables, charts, and graphs to represent the data.
 c. Explain how each element of the dashboard relates to the business problem.
 d. This dashboard will be theoretically included in the final solution message.
+e. Precompute the GROUP BY rollups behind the dashboard with create_materialized_view and read them from the view tables, calling refresh_view after any new data is loaded.
 
 8. Craft the final solution message:
 a. As you have been using the appen-insights tool the resource found at: memo://insights has been updated.
@@ -103,68 +133,2288 @@ The provided XML tags are for the assistants understanding. Implore to make all
 Start your first message fully in character with something like "Oh, Hey there! I see you've chosen the topic {topic}. Let's get started! 🚀"
 """
 
+DEFAULT_POOL_SIZE = 4
+# One reader for read_query cursors to pin, and one always left for every other tool
+MIN_POOL_SIZE = 2
+# Immutable databases take no locks, so read-only mode can afford many more parallel readers
+DEFAULT_READ_ONLY_POOL_SIZE = max(DEFAULT_POOL_SIZE, 2 * (os.cpu_count() or 1))
+
+# PRAGMAs applied to every pooled connection. WAL is used throughout so readers never block on
+# the writer; the profiles differ in how much durability and memory they trade for speed.
+PRAGMA_PROFILES: dict[str, dict[str, Any]] = {
+    "default": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -16384,
+        "temp_store": "DEFAULT",
+    },
+    "read-heavy": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -262144,
+        "mmap_size": 1 << 30,
+        "temp_store": "MEMORY",
+    },
+    "bulk-load": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "busy_timeout": 30000,
+        "cache_size": -262144,
+        "temp_store": "MEMORY",
+    },
+    # For --read-only: immutable files need no journal or locking; SQLite caps mmap_size at its
+    # compile-time maximum
+    "read-only": {
+        "cache_size": -262144,
+        "mmap_size": 1 << 40,
+        "temp_store": "MEMORY",
+    },
+}
+
+
+def resolve_pragmas(profile: str = "default", overrides: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Return the PRAGMAs of a named profile with any non-None overrides applied on top"""
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(f"Unknown PRAGMA profile: {profile}")
+    pragmas = dict(PRAGMA_PROFILES[profile])
+    pragmas.update({name: value for name, value in (overrides or {}).items() if value is not None})
+    return pragmas
+
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_MAX_PAGE_ROWS = 10000
+DEFAULT_MAX_RESULT_BYTES = 1 << 20
+DEFAULT_CURSOR_IDLE_TIMEOUT = 60.0
+FETCH_BATCH_SIZE = 256
+
+DEFAULT_CACHED_STATEMENTS = 512
+DEFAULT_BULK_CHUNK_SIZE = 1000
+TYPE_INFERENCE_ROWS = 1000
+DEFAULT_SLOW_QUERY_MS = 100.0
+SLOW_QUERY_LOG_SIZE = 100
+MAX_COVERING_INDEX_COLUMNS = 6
+VIEWS_TABLE = "_mcp_views"
+FTS_SNIPPET_TOKENS = 16
+SAMPLES_TABLE = "_mcp_samples"
+INSIGHTS_TABLE = "_mcp_insights"
+# Tables the server keeps its own state in; list_tables and describe_schema leave them out
+INTERNAL_TABLE_PREFIX = "_mcp_"
+FTS5_SHADOW_SUFFIXES = ("_data", "_idx", "_content", "_docsize", "_config")
+# The memo resource shows this many of the latest insights; older ones are read page by page
+MEMO_INSIGHTS = 200
+DEFAULT_INSIGHTS_PAGE = 100
+DEFAULT_SAMPLE_RATE = 0.01
+# Rows are kept when (random() & (SAMPLE_RESOLUTION - 1)) < rate * SAMPLE_RESOLUTION
+SAMPLE_RESOLUTION = 1 << 20
+PROGRESS_HANDLER_STEPS = 1000
+MAX_TRACKED_QUERIES = 500
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+ROW_COUNT_BUCKETS = (0, 1, 10, 100, 1000, 10000)
+STATEMENT_CACHE_SIZE = 1024
+MAIN_DATABASE = "main"
+# SQLite's default SQLITE_MAX_ATTACHED
+MAX_ATTACHED_DATABASES = 10
+# Tools that act on the server rather than on one database, and so take no `database` argument
+SERVER_TOOLS = frozenset({'attach_database', 'list_databases', 'append_insight'})
+WRITE_TOOLS = frozenset({
+    'write_query', 'create_table', 'bulk_insert', 'import_file', 'execute_batch', 'create_materialized_view', 'refresh_view',
+    'create_fts_index',
+})
+WRITE_KEYWORDS = frozenset({'INSERT', 'REPLACE', 'UPDATE', 'DELETE', 'CREATE', 'DROP', 'ALTER'})
+DDL_KEYWORDS = frozenset({'CREATE', 'DROP', 'ALTER'})
+
+QueryParams = Sequence[Any] | dict[str, Any]
+
+_LEADING_COMMENTS = re.compile(r"\s*(?:(?:--[^\n]*(?:\n|$)|/\*.*?\*/)\s*)*", re.DOTALL)
+_FTS5_TABLE = re.compile(r"\s*CREATE\s+VIRTUAL\s+TABLE\b.*?\bUSING\s+fts5\b", re.IGNORECASE | re.DOTALL)
+
+
+@functools.lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def statement_keywords(query: str) -> tuple[str, ...]:
+    """Return the first two keywords of a statement in upper case, skipping leading comments.
+
+    Agents issue the same query text over and over, so classifications are kept in an LRU cache.
+    """
+    body = query[_LEADING_COMMENTS.match(query).end():]
+    return tuple(word.upper() for word in body.split(None, 2)[:2])
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a table or column name for safe interpolation into SQL"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def is_write_statement(query: str) -> bool:
+    """Whether a statement modifies the database, judged by its first keyword"""
+    keywords = statement_keywords(query)
+    return bool(keywords) and keywords[0] in WRITE_KEYWORDS
+
+
+T = TypeVar("T")
+
+
+class QueryHandle:
+    """Tracks the pooled connection a running query has borrowed so another thread can interrupt it"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self.interrupted = False
+
+    @contextmanager
+    def attach(self, conn: sqlite3.Connection) -> Iterator[None]:
+        with self._lock:
+            if self.interrupted:
+                raise sqlite3.OperationalError("interrupted")
+            self._conn = conn
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._conn = None
+
+    def interrupt(self) -> None:
+        """Abort the statement currently running on the attached connection, if any"""
+        with self._lock:
+            self.interrupted = True
+            if self._conn is not None:
+                self._conn.interrupt()
+
+
+_active_query = threading.local()
+
+
+@contextmanager
+def _track(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Attach `conn` to the QueryHandle of the query running on this thread, if any"""
+    handle: QueryHandle | None = getattr(_active_query, "handle", None)
+    if handle is None:
+        yield conn
+        return
+    with handle.attach(conn):
+        yield conn
+
+
+class PooledConnection(sqlite3.Connection):
+    """A connection that counts SQLite virtual machine steps, a proxy for the rows a query scans"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.vm_steps = 0
+        # Databases ATTACHed to this connection, by alias, see ConnectionPool.attach()
+        self.attached: dict[str, str] = {}
+        self.set_progress_handler(self._count_steps, PROGRESS_HANDLER_STEPS)
+
+    def _count_steps(self) -> int:
+        self.vm_steps += PROGRESS_HANDLER_STEPS
+        return 0
+
+
+class ConnectionPool:
+    """Long-lived SQLite connections: one shared writer plus up to `size` readers.
+
+    Connections are opened lazily, have their PRAGMAs applied exactly once, and are
+    handed out most-recently-used first so hot read paths keep a warm page cache.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        size: int = DEFAULT_POOL_SIZE,
+        pragmas: dict[str, Any] | None = None,
+        cached_statements: int = DEFAULT_CACHED_STATEMENTS,
+        read_only: bool = False,
+    ):
+        if size < 1:
+            raise ValueError("Connection pool size must be at least 1")
+        self.db_path = db_path
+        self.size = size
+        self.pragmas = dict(pragmas or {})
+        self.cached_statements = cached_statements
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: list[sqlite3.Connection] = []
+        self._readers: list[sqlite3.Connection] = []
+        self._writer_lock = threading.Lock()
+        self._writer: sqlite3.Connection | None = None
+        self._watcher_lock = threading.Lock()
+        self._watcher: sqlite3.Connection | None = None
+        # Replaced, never mutated, so connections can compare against it without the lock
+        self._attachments: dict[str, str] = {}
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        logger.debug(f"Opening pooled connection to {self.db_path}")
+        conn = sqlite3.connect(
+            # immutable=1 promises SQLite that nobody modifies the file, so it skips all locking.
+            # Opening as a URI also lets ATTACH take URIs, see attach().
+            Path(self.db_path).absolute().as_uri() + ("?mode=ro&immutable=1" if self.read_only else ""),
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            factory=PooledConnection,
+            uri=True,
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    def attach(self, alias: str, path: str, read_only: bool = False) -> None:
+        """ATTACH another database file under `alias` on every connection of this pool.
+
+        Read-only databases, and every database attached to a read-only pool, are attached
+        with `mode=ro` so statements on this pool cannot write to them either. Idle
+        connections pick up the new attachment the next time they are checked out.
+        """
+        target = Path(path).absolute().as_uri() + ("?mode=ro" if read_only or self.read_only else "")
+        with self._lock:
+            if alias in self._attachments:
+                raise ValueError(f"Database {alias} is already attached")
+            self._attachments = {**self._attachments, alias: target}
+
+    @property
+    def attachments(self) -> dict[str, str]:
+        return dict(self._attachments)
+
+    def _sync_attachments(self, conn: sqlite3.Connection) -> sqlite3.Connection:
+        attachments = self._attachments
+        if conn.attached != attachments:
+            for alias, target in attachments.items():
+                if alias not in conn.attached:
+                    conn.execute(f"ATTACH DATABASE ? AS {quote_identifier(alias)}", (target,))
+            conn.attached = dict(attachments)
+        return conn
+
+    def acquire_reader(self) -> sqlite3.Connection:
+        """Check out a reader connection, blocking while all `size` readers are in use.
+
+        Every call must be paired with `release_reader()`; prefer the `reader()` context manager.
+        """
+        self._slots.acquire()
+        try:
+            with self._lock:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Connection pool is closed")
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._connect()
+                with self._lock:
+                    self._readers.append(conn)
+            return self._sync_attachments(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release_reader(self, conn: sqlite3.Connection) -> None:
+        """Return a reader connection obtained from `acquire_reader()`"""
+        with self._lock:
+            if not self._closed:
+                self._idle.append(conn)
+        self._slots.release()
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a reader connection for the duration of the block"""
+        conn = self.acquire_reader()
+        try:
+            with _track(conn):
+                yield conn
+        finally:
+            self.release_reader(conn)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Borrow the single writer connection; writes are serialized on it"""
+        if self.read_only:
+            raise sqlite3.OperationalError("attempt to write a readonly database")
+        with self._writer_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+            if self._writer is None:
+                self._writer = self._connect()
+            self._sync_attachments(self._writer)
+            try:
+                with _track(self._writer):
+                    yield self._writer
+            except BaseException:
+                if self._writer.in_transaction:
+                    self._writer.rollback()
+                raise
+
+    def data_version(self) -> tuple[int, ...]:
+        """Return `PRAGMA data_version` of the database and each attached one, as seen by a
+        dedicated, otherwise idle connection.
+
+        The value changes whenever any other connection commits, including this pool's writer.
+        """
+        with self._watcher_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+            if self._watcher is None:
+                self._watcher = self._connect()
+            watcher = self._sync_attachments(self._watcher)
+            return tuple(
+                watcher.execute(f"PRAGMA {quote_identifier(schema)}.data_version").fetchone()[0]
+                for schema in ("main", *watcher.attached)
+            )
+
+    def close(self) -> None:
+        """Close every connection opened by the pool"""
+        with self._lock:
+            self._closed = True
+            connections = self._readers
+            self._readers, self._idle = [], []
+        with self._writer_lock:
+            if self._writer is not None:
+                connections.append(self._writer)
+                self._writer = None
+        with self._watcher_lock:
+            if self._watcher is not None:
+                connections.append(self._watcher)
+                self._watcher = None
+        for conn in connections:
+            conn.close()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class ResultEncoder(ABC):
+    """Renders result rows, as plain `sqlite3` tuples, into one text page of a given output format"""
+
+    def __init__(self, columns: list[str]):
+        self.columns = columns
+
+    @abstractmethod
+    def encode_row(self, row: tuple[Any, ...]) -> str:
+        ...
+
+    @abstractmethod
+    def encode_page(self, rows: list[str]) -> str:
+        ...
+
+
+class RecordsEncoder(ResultEncoder):
+    """The original output: a Python list of {column: value} dicts"""
+
+    def encode_row(self, row: tuple[Any, ...]) -> str:
+        return repr(dict(zip(self.columns, row)))
+
+    def encode_page(self, rows: list[str]) -> str:
+        return "[" + ", ".join(rows) + "]"
+
+
+class ColumnarEncoder(ResultEncoder):
+    """JSON with the column names once and each row as an array"""
+
+    def encode_row(self, row: tuple[Any, ...]) -> str:
+        return json.dumps(row, default=_json_default)
+
+    def encode_page(self, rows: list[str]) -> str:
+        return '{"columns": ' + json.dumps(self.columns) + ', "rows": [' + ", ".join(rows) + "]}"
+
+
+class CsvEncoder(ResultEncoder):
+    """CSV with a header line"""
+
+    def __init__(self, columns: list[str]):
+        super().__init__(columns)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def encode_row(self, row: tuple[Any, ...]) -> str:
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._writer.writerow(value.hex() if isinstance(value, bytes) else value for value in row)
+        return self._buffer.getvalue()
+
+    def encode_page(self, rows: list[str]) -> str:
+        return self.encode_row(tuple(self.columns)) + "".join(rows)
+
+
+class JsonLinesEncoder(ResultEncoder):
+    """One JSON object per line"""
+
+    def encode_row(self, row: tuple[Any, ...]) -> str:
+        return json.dumps(dict(zip(self.columns, row)), default=_json_default)
+
+    def encode_page(self, rows: list[str]) -> str:
+        return "\n".join(rows)
+
+
+OUTPUT_FORMATS: dict[str, type[ResultEncoder]] = {
+    "records": RecordsEncoder,
+    "columnar": ColumnarEncoder,
+    "csv": CsvEncoder,
+    "jsonl": JsonLinesEncoder,
+}
+
+
+FILE_FORMATS = ("csv", "jsonl")
+
+_INTEGER_TEXT = re.compile(r"[-+]?(?:0|[1-9][0-9]*)")
+_REAL_TEXT = re.compile(r"[-+]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?")
+
+
+def file_format(path: Path, format: str | None = None) -> str:
+    """Return the data file format, taken from the file extension unless given explicitly"""
+    format = format or path.suffix.lstrip(".").lower()
+    if format == "ndjson":
+        format = "jsonl"
+    if format not in FILE_FORMATS:
+        raise ValueError(f"Unsupported file format: {format or path.name}; expected one of {', '.join(FILE_FORMATS)}")
+    return format
+
+
+def parse_csv_value(text: str) -> Any:
+    """Convert a CSV field to an int or float where it is written as one; empty fields become NULL.
+
+    Numbers with leading zeros, such as postal codes, stay text.
+    """
+    if text == "":
+        return None
+    if _INTEGER_TEXT.fullmatch(text):
+        return int(text)
+    if _REAL_TEXT.fullmatch(text) and not re.match(r"[-+]?0[0-9]", text):
+        return float(text)
+    return text
+
+
+def infer_column_type(values: Iterable[Any]) -> str:
+    """Pick INTEGER, REAL or TEXT as the declared type for a column holding `values`"""
+    kinds = {type(value) for value in values if value is not None}
+    if kinds and kinds <= {int, bool}:
+        return "INTEGER"
+    if kinds and kinds <= {int, float, bool}:
+        return "REAL"
+    return "TEXT"
+
+
+def _iter_json_lines(file: io.TextIOBase) -> Iterator[dict[str, Any]]:
+    for number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {number} is not a JSON object")
+        yield record
+
+
+def _json_row(record: dict[str, Any], columns: list[str]) -> tuple[Any, ...]:
+    unknown = record.keys() - set(columns)
+    if unknown:
+        raise ValueError(f"Unexpected keys {sorted(unknown)}; expected only {columns}")
+    return tuple(
+        json.dumps(value) if isinstance(value, (dict, list)) else value
+        for value in (record.get(column) for column in columns)
+    )
+
+
+class OpenCursor:
+    """A partially consumed `read_query` result set that holds on to its reader connection"""
+
+    def __init__(self, query: str, params: QueryParams | None, conn: sqlite3.Connection, cursor: sqlite3.Cursor):
+        self.key = self.statement_key(query, params)
+        self.conn = conn
+        self.cursor = cursor
+        self.columns = [column[0] for column in cursor.description or ()]
+        self.last_used = time.monotonic()
+        self._buffer: deque[tuple[Any, ...]] = deque()
+        self._exhausted = False
+
+    @staticmethod
+    def statement_key(query: str, params: QueryParams | None) -> int:
+        """Hash of the query and its bound parameters, so a cursor is only resumed by the same call"""
+        return hash((query, repr(params or None)))
+
+    def _next_row(self) -> tuple[Any, ...] | None:
+        if not self._buffer and not self._exhausted:
+            self._buffer.extend(self.cursor.fetchmany(FETCH_BATCH_SIZE))
+            self._exhausted = not self._buffer
+        return self._buffer.popleft() if self._buffer else None
+
+    def fetch_page(self, page_size: int, max_bytes: int, encoder: ResultEncoder) -> tuple[list[str], bool]:
+        """Encode up to `page_size` rows, stopping early once `max_bytes` of output is reached.
+
+        Returns the encoded rows and whether more remain. At least one row is returned per page.
+        """
+        rows: list[str] = []
+        size = 0
+        while len(rows) < page_size:
+            row = self._next_row()
+            if row is None:
+                return rows, False
+            encoded = encoder.encode_row(row)
+            size += len(encoded) + 2
+            if rows and size > max_bytes:
+                self._buffer.appendleft(row)
+                return rows, True
+            rows.append(encoded)
+        row = self._next_row()
+        if row is None:
+            return rows, False
+        self._buffer.appendleft(row)
+        return rows, True
+
+
+class CursorRegistry:
+    """Server-side cursors for paginated `read_query` results.
+
+    Each open cursor pins one pooled reader connection, so the registry holds at most
+    `max_open` of them and releases cursors that have been idle for `idle_timeout` seconds.
+    """
+
+    def __init__(self, pool: ConnectionPool, max_open: int, idle_timeout: float = DEFAULT_CURSOR_IDLE_TIMEOUT):
+        self.pool = pool
+        self.max_open = max(1, max_open)
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Condition()
+        self._cursors: OrderedDict[str, OpenCursor] = OrderedDict()
+        # Readers pinned by cursors that are registered, being paged through, or about to open
+        self._pinned = 0
+
+    def __len__(self) -> int:
+        return len(self._cursors)
+
+    def register(self, entry: OpenCursor) -> str:
+        token = secrets.token_urlsafe(16)
+        entry.last_used = time.monotonic()
+        with self._lock:
+            self._cursors[token] = entry
+            self._lock.notify()
+        return token
+
+    def take(self, token: str) -> OpenCursor:
+        """Remove and return an open cursor so that only one request can page through it at a time"""
+        self.evict_idle()
+        with self._lock:
+            entry = self._cursors.pop(token, None)
+        if entry is None:
+            raise ValueError(f"Unknown or expired cursor: {token}")
+        return entry
+
+    def release(self, entry: OpenCursor) -> None:
+        """Close a cursor and return its connection to the pool"""
+        try:
+            entry.cursor.close()
+        finally:
+            self.pool.release_reader(entry.conn)
+            self.unreserve()
+
+    def make_room(self) -> None:
+        """Reserve a slot for a new cursor, evicting idle and least recently used cursors so it
+        can be opened without starving the pool.
+
+        The reservation is taken under the lock, so concurrent first pages cannot overcommit the
+        pool and then block on readers pinned by cursors nobody is paging through. When every
+        slot belongs to a cursor that is still being paged, wait for one to finish its page.
+        Pair with `register()`, or with `release()`/`unreserve()` if the cursor is not kept.
+        """
+        self.evict_idle()
+        with self._lock:
+            evicted = []
+            while self._pinned >= self.max_open:
+                if self._cursors:
+                    evicted.append(self._cursors.popitem(last=False)[1])
+                    self._pinned -= 1
+                else:
+                    self._lock.wait()
+            self._pinned += 1
+        for entry in evicted:
+            try:
+                entry.cursor.close()
+            finally:
+                self.pool.release_reader(entry.conn)
+
+    def unreserve(self) -> None:
+        with self._lock:
+            self._pinned -= 1
+            self._lock.notify()
+
+    def evict_idle(self) -> None:
+        deadline = time.monotonic() - self.idle_timeout
+        with self._lock:
+            expired = [token for token, entry in self._cursors.items() if entry.last_used < deadline]
+            evicted = [self._cursors.pop(token) for token in expired]
+        for entry in evicted:
+            logger.debug("Evicting idle read_query cursor")
+            self.release(entry)
+
+    def close(self) -> None:
+        with self._lock:
+            evicted = list(self._cursors.values())
+            self._cursors.clear()
+        for entry in evicted:
+            self.release(entry)
+
+
+class SchemaCatalog:
+    """In-memory copy of the database schema, rebuilt only when `PRAGMA schema_version` changes.
+
+    Holds every table and view with its columns (as `PRAGMA table_info` rows), indexes and
+    foreign keys, so introspection tools avoid re-querying `sqlite_master` on every call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: int | None = None
+        self._objects: dict[str, dict[str, Any]] = {}
+        self._visible: dict[str, dict[str, Any]] = {}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version = None
+
+    def get(self, conn: sqlite3.Connection) -> dict[str, dict[str, Any]]:
+        """Return the catalog, rebuilding it first if the schema changed since the last call"""
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        with self._lock:
+            if version != self._version:
+                logger.debug(f"Rebuilding schema catalog at schema version {version}")
+                self._objects = self._load(conn)
+                internal = self._internal(conn)
+                self._visible = {name: info for name, info in self._objects.items() if name not in internal}
+                self._version = version
+            return self._objects
+
+    def visible(self, conn: sqlite3.Connection) -> dict[str, dict[str, Any]]:
+        """Return the catalog without the server's own tables and the shadow tables of FTS5 indexes"""
+        self.get(conn)
+        with self._lock:
+            return self._visible
+
+    @staticmethod
+    def _internal(conn: sqlite3.Connection) -> set[str]:
+        internal = set()
+        for name, sql in conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'"):
+            if name.startswith(INTERNAL_TABLE_PREFIX):
+                internal.add(name)
+            elif sql and _FTS5_TABLE.match(sql):
+                internal.update(name + suffix for suffix in FTS5_SHADOW_SUFFIXES)
+        return internal
+
+    @staticmethod
+    def _load(conn: sqlite3.Connection) -> dict[str, dict[str, Any]]:
+        objects: dict[str, dict[str, Any]] = {}
+        for name, kind in conn.execute("SELECT name, type FROM sqlite_master WHERE type IN ('table', 'view')"):
+            quoted = quote_identifier(name)
+            cursor = conn.execute(f"PRAGMA table_info({quoted})")
+            columns = [column[0] for column in cursor.description]
+            indexes = []
+            for index in conn.execute(f"PRAGMA index_list({quoted})").fetchall():
+                index_name, unique = index[1], index[2]
+                indexed = [row[2] for row in conn.execute(f"PRAGMA index_info({quote_identifier(index_name)})")]
+                indexes.append({"name": index_name, "unique": bool(unique), "columns": indexed})
+            foreign_keys = [
+                {"from": row[3], "table": row[2], "to": row[4], "on_update": row[5], "on_delete": row[6]}
+                for row in conn.execute(f"PRAGMA foreign_key_list({quoted})")
+            ]
+            objects[name] = {
+                "type": kind,
+                "columns": [dict(zip(columns, row)) for row in cursor.fetchall()],
+                "indexes": indexes,
+                "foreign_keys": foreign_keys,
+            }
+        return objects
+
+
+def find_schema_object(catalog: dict[str, dict[str, Any]], name: str) -> dict[str, Any] | None:
+    """Look up a table or view in the catalog the way SQLite resolves names, ignoring case"""
+    if name in catalog:
+        return catalog[name]
+    folded = name.lower()
+    return next((info for key, info in catalog.items() if key.lower() == folded), None)
+
+
+def estimate_row_count(conn: sqlite3.Connection, table: str) -> int | None:
+    """Cheaply estimate a table's row count from sqlite_stat1 (after ANALYZE) or its largest rowid"""
+    try:
+        stat = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? AND idx IS NULL", (table,)).fetchone()
+        if stat is None:
+            stat = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,)).fetchone()
+        if stat is not None:
+            return int(stat[0].split()[0])
+    except sqlite3.OperationalError:
+        pass  # no sqlite_stat1 table until ANALYZE has run
+    try:
+        return conn.execute(f"SELECT max(rowid) FROM {quote_identifier(table)}").fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return None  # WITHOUT ROWID table
+
+
+class ResultCache:
+    """LRU cache of rendered `read_query` results, bounded by the total size of the cached text.
+
+    Entries are tagged with the `PRAGMA data_version`s they were computed at and are discarded on
+    lookup once the database has changed since.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[tuple[int, ...], str]] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(query: str, params: QueryParams | None, output_format: str, page_size: int) -> Hashable:
+        return (query.strip().rstrip(";").rstrip(), repr(params or None), output_format, page_size)
+
+    def get(self, key: Hashable, version: tuple[int, ...]) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != version:
+                self._discard(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, version: tuple[int, ...], text: str) -> None:
+        if len(text) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (version, text)
+            self._size += len(text)
+            while self._size > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _discard(self, key: Hashable) -> None:
+        _, text = self._entries.pop(key)
+        self._size -= len(text)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class SlowQueryLog:
+    """The most recent distinct queries that took longer than `threshold_ms`, with their timings"""
+
+    def __init__(self, threshold_ms: float = DEFAULT_SLOW_QUERY_MS, max_entries: int = SLOW_QUERY_LOG_SIZE):
+        self.threshold_ms = threshold_ms
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    def record(self, query: str, params: QueryParams | None, elapsed_ms: float) -> None:
+        if elapsed_ms < self.threshold_ms:
+            return
+        slow_query_logger.warning(json.dumps({"elapsed_ms": round(elapsed_ms, 3), "query": query, "params": params}, default=repr))
+        with self._lock:
+            entry = self._entries.pop(query, None) or {"query": query, "count": 0, "max_ms": 0.0, "total_ms": 0.0}
+            entry["params"] = params
+            entry["count"] += 1
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["total_ms"] += elapsed_ms
+            self._entries[query] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def entries(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [dict(entry) for entry in self._entries.values()]
+
+
+class InsightStore:
+    """Business insights behind the memo resource, persisted in the `_mcp_insights` table.
+
+    Only the latest `MEMO_INSIGHTS` insights are held in memory, and the rendered memo is cached
+    until the next append, so appending and reading stay cheap however many insights pile up.
+    Older insights are read back from the table with `page()`. On a read-only database new
+    insights are kept in memory only.
+    """
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+        self._lock = threading.Lock()
+        self._recent: deque[tuple[int, str]] = deque(maxlen=MEMO_INSIGHTS)
+        self._count = 0
+        self._memo: str | None = None
+        self._table_exists = False
+        # Insights above this id were appended on a read-only database and exist only in memory
+        self._saved_id = 0
+        with pool.reader() as conn:
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (INSIGHTS_TABLE,)).fetchone():
+                self._table_exists = True
+                self._count = conn.execute(f"SELECT count(*) FROM {INSIGHTS_TABLE}").fetchone()[0]
+                latest = conn.execute(
+                    f"SELECT id, insight FROM {INSIGHTS_TABLE} ORDER BY id DESC LIMIT ?", (MEMO_INSIGHTS,)
+                ).fetchall()
+                self._recent.extend(reversed(latest))
+                self._saved_id = latest[0][0] if latest else 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, insight: str) -> int:
+        """Store an insight and return its id"""
+        if self.pool.read_only:
+            with self._lock:
+                insight_id = max(self._recent[-1][0] if self._recent else 0, self._saved_id) + 1
+                self._add(insight_id, insight)
+            return insight_id
+        with self.pool.writer() as conn:
+            if not self._table_exists:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {INSIGHTS_TABLE} ("
+                    "id INTEGER PRIMARY KEY, insight TEXT NOT NULL, created_at TEXT NOT NULL DEFAULT (datetime('now')))"
+                )
+                self._table_exists = True
+            insight_id = conn.execute(f"INSERT INTO {INSIGHTS_TABLE} (insight) VALUES (?)", (insight,)).lastrowid
+            conn.commit()
+            # Still under the writer lock, so insights enter the memo in id order
+            with self._lock:
+                self._add(insight_id, insight)
+        return insight_id
+
+    def _add(self, insight_id: int, insight: str) -> None:
+        self._recent.append((insight_id, insight))
+        self._count += 1
+        self._memo = None
+
+    def memo(self) -> str:
+        """The memo of the latest insights, rendered once per change"""
+        with self._lock:
+            if self._memo is None:
+                logger.debug(f"Rendering memo with {len(self._recent)} of {self._count} insights")
+                self._memo = self._render()
+            return self._memo
+
+    def _render(self) -> str:
+        if not self._count:
+            return "No business insights have been discovered yet."
+
+        memo = "📊 Business Intelligence Memo 📊\n\n"
+        memo += "Key Insights Discovered:\n\n"
+        memo += "\n".join(f"- {insight}" for _, insight in self._recent)
+
+        if self._count > 1:
+            memo += "\nSummary:\n"
+            memo += f"Analysis has revealed {self._count} key business insights that suggest opportunities for strategic optimization and growth."
+        if self._count > len(self._recent):
+            memo += (
+                f"\n\nShowing the latest {len(self._recent)} insights. "
+                "Read memo://insights?since=0 to page through all of them."
+            )
+        return memo
+
+    def page(self, since: int = 0, limit: int = DEFAULT_INSIGHTS_PAGE) -> tuple[list[tuple[int, str]], int | None]:
+        """Return up to `limit` insights with an id above `since`, oldest first, and the `since`
+        value for the next page, or None if there are no more"""
+        limit = max(1, limit)
+        rows: list[tuple[int, str]] = []
+        if self._table_exists:
+            with self.pool.reader() as conn:
+                rows = conn.execute(
+                    f"SELECT id, insight FROM {INSIGHTS_TABLE} WHERE id > ? ORDER BY id LIMIT ?", (since, limit + 1)
+                ).fetchall()
+        if self.pool.read_only and len(rows) <= limit:
+            with self._lock:
+                rows += [entry for entry in self._recent if entry[0] > max(since, self._saved_id)][:limit + 1 - len(rows)]
+        if len(rows) > limit:
+            return rows[:limit], rows[limit - 1][0]
+        return rows, None
+
+
+_PLAN_DETAIL = re.compile(
+    r"^(?P<operation>SCAN|SEARCH)\s+(?:TABLE\s+)?(?P<table>\S+)(?:\s+AS\s+(?P<alias>\S+))?"
+    r"(?:\s+USING\s+(?:(?P<covering>COVERING\s+)?INDEX\s+(?P<index>\S+)|(?P<primary>INTEGER PRIMARY KEY|PRIMARY KEY)))?"
+)
+
+
+def parse_query_plan(
+    plan: list[tuple[Any, ...]],
+    row_estimates: dict[str, int | None],
+    aliases: dict[str, str] | None = None,
+) -> dict[str, Any]:
+    """Turn `EXPLAIN QUERY PLAN` rows into a tree annotated with scan/search details and a rough cost.
+
+    A full SCAN is charged the table's estimated row count and an indexed SEARCH about log2 of it,
+    which is enough to rank plans and to spot the scans worth indexing. Recent SQLite versions name
+    tables by their alias in the plan; `aliases` maps those (lower-cased) back to table names.
+    """
+    aliases = aliases or {}
+    nodes: dict[int, dict[str, Any]] = {}
+    roots: list[dict[str, Any]] = []
+    total_cost = 0.0
+    for node_id, parent, _, detail in plan:
+        node: dict[str, Any] = {"id": node_id, "detail": detail, "children": []}
+        match = _PLAN_DETAIL.match(detail)
+        if match:
+            table = aliases.get(match["table"].lower(), match["table"])
+            rows = row_estimates.get(table) or 0
+            node.update({
+                "operation": match["operation"],
+                "table": table,
+                "index": match["index"] or (match["primary"] and "PRIMARY KEY"),
+                "covering": bool(match["covering"]),
+            })
+            if match["operation"] == "SCAN":
+                node["estimated_cost"] = float(rows)
+            else:
+                node["estimated_cost"] = round(math.log2(rows + 1) + 1, 2)
+            total_cost += node["estimated_cost"]
+        elif "TEMP B-TREE" in detail:
+            node["operation"] = "SORT"
+        nodes[node_id] = node
+        (nodes[parent]["children"] if parent in nodes else roots).append(node)
+    return {"plan": roots, "estimated_cost": round(total_cost, 2)}
+
+
+def iter_plan_nodes(nodes: list[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+    for node in nodes:
+        yield node
+        yield from iter_plan_nodes(node["children"])
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_TABLE_REFERENCE = re.compile(
+    r"\b(?:FROM|JOIN)\s+[\"`\[]?(\w+)[\"`\]]?(?:\s+(?:AS\s+)?(?!(?:WHERE|JOIN|ON|INNER|LEFT|RIGHT|CROSS|NATURAL|GROUP|ORDER|LIMIT|USING)\b)(\w+))?",
+    re.IGNORECASE,
+)
+_EQUALITY = re.compile(r"(?:(\w+)\.)?(\w+)\s*(?:==?|\bIN\b|\bIS\b(?!\s+NOT\b))", re.IGNORECASE)
+_EQUALITY_RHS = re.compile(r"==?\s*(?:(\w+)\.)?(\w+)", re.IGNORECASE)
+_RANGE = re.compile(r"(?:(\w+)\.)?(\w+)\s*(?:<=?|>=?|\bBETWEEN\b|\bLIKE\b|\bGLOB\b)", re.IGNORECASE)
+_ORDER_BY = re.compile(r"\b(?:ORDER|GROUP)\s+BY\s+(.*?)(?:\bLIMIT\b|\bHAVING\b|\bORDER\b|$)", re.IGNORECASE | re.DOTALL)
+_SELECT_LIST = re.compile(r"^\s*SELECT\s+(?:DISTINCT\s+)?(.*?)\bFROM\b", re.IGNORECASE | re.DOTALL)
+
+
+def table_aliases(query: str) -> dict[str, str]:
+    """Map the lower-cased aliases in a query's FROM and JOIN clauses to their table names"""
+    text = _STRING_LITERAL.sub("?", query)
+    return {alias.lower(): name for name, alias in _TABLE_REFERENCE.findall(text) if alias}
+
+
+def null_params(query: str) -> QueryParams:
+    """Bind NULL to every placeholder in a query, so it can be planned without real values"""
+    text = _STRING_LITERAL.sub("", query)
+    names = re.findall(r"[:@$](\w+)", text)
+    if names:
+        return {name: None for name in names}
+    return [None] * len(re.findall(r"\?", text))
+
+
+def suggest_index(query: str, table: str, columns: list[str]) -> list[str]:
+    """Pick index columns for `table` from how `query` filters, joins and sorts on it.
+
+    Equality-constrained columns come first, then at most one range-constrained column, then
+    ORDER BY / GROUP BY columns. If the remaining selected columns are few, they are appended so
+    the index covers the query. This is a heuristic over the SQL text, not a full parser.
+    """
+    text = _STRING_LITERAL.sub("?", query)
+    known = {column.lower(): column for column in columns}
+    qualifiers = {table.lower()} | {alias for alias, name in table_aliases(query).items() if name.lower() == table.lower()}
+
+    def matching(pattern: re.Pattern[str], fragment: str) -> list[str]:
+        found = []
+        for qualifier, name in pattern.findall(fragment):
+            column = known.get(name.lower())
+            if column and (not qualifier or qualifier.lower() in qualifiers) and column not in found:
+                found.append(column)
+        return found
+
+    where = re.split(r"\bWHERE\b|\bON\b", text, flags=re.IGNORECASE)
+    predicates = " ".join(where[1:])
+    predicates = re.split(r"\b(?:ORDER|GROUP)\s+BY\b|\bLIMIT\b", predicates, flags=re.IGNORECASE)[0]
+    chosen = matching(_EQUALITY, predicates)
+    chosen += [column for column in matching(_EQUALITY_RHS, predicates) if column not in chosen]
+    chosen += [column for column in matching(_RANGE, predicates) if column not in chosen][:1]
+    order = _ORDER_BY.search(text)
+    if order:
+        chosen += [column for column in matching(re.compile(r"(?:(\w+)\.)?(\w+)"), order.group(1)) if column not in chosen]
+    if not chosen:
+        return []
+
+    select = _SELECT_LIST.match(text)
+    if select and select.group(1).strip() != "*":
+        selected = matching(re.compile(r"(?:(\w+)\.)?(\w+)"), select.group(1))
+        extra = [column for column in selected if column not in chosen]
+        if len(chosen) + len(extra) <= MAX_COVERING_INDEX_COLUMNS:
+            chosen += extra
+    return chosen
+
+
+_AGGREGATE_VIEW = re.compile(
+    r"\s*SELECT\s+(?P<select>.+?)\s+FROM\s+(?P<table>\w+|\"[^\"]+\")"
+    r"(?:\s+(?:AS\s+)?(?!(?:WHERE|GROUP)\b)(?P<alias>\w+))?"
+    r"(?:\s+WHERE\s+(?P<where>.+?))?"
+    r"\s+GROUP\s+BY\s+(?P<group>.+?)\s*;?\s*",
+    re.IGNORECASE | re.DOTALL,
+)
+_NON_INCREMENTAL = re.compile(
+    r"\b(?:JOIN|HAVING|ORDER|LIMIT|WINDOW|OVER|UNION|INTERSECT|EXCEPT|DISTINCT|RANDOM|CURRENT_\w+)\b|\bSELECT\b.*\bSELECT\b",
+    re.IGNORECASE | re.DOTALL,
+)
+_VIEW_COLUMN = re.compile(r"(?P<expression>.+?)(?:\s+AS\s+(?P<alias>\w+|\"[^\"]+\"))?", re.IGNORECASE | re.DOTALL)
+_DECOMPOSABLE_AGGREGATE = re.compile(r"(?P<function>COUNT|SUM|TOTAL|MIN|MAX)\s*\(.*\)", re.IGNORECASE | re.DOTALL)
+
+
+def split_top_level(text: str) -> list[str]:
+    """Split a SQL list on the commas that are not inside parentheses or quotes"""
+    parts: list[str] = []
+    depth = 0
+    quote: str | None = None
+    start = 0
+    for index, char in enumerate(text):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(text[start:index].strip())
+            start = index + 1
+    parts.append(text[start:].strip())
+    return parts
+
+
+def _is_single_call(expression: str) -> bool:
+    """Whether the closing parenthesis at the end of `expression` matches its first opening one"""
+    depth = 0
+    for char in expression[expression.index("(") + 1:-1]:
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        if depth < 0:
+            return False
+    return depth == 0
+
+
+def parse_aggregate_view(query: str) -> dict[str, Any] | None:
+    """Recognize a single-table `SELECT keys, AGG(...) ... GROUP BY keys` that can be refreshed
+    incrementally, i.e. whose aggregates are all COUNT, SUM, TOTAL, MIN or MAX.
+
+    Returns the parts needed to re-run the query over a rowid range, with the kind of every
+    output column ("key" or the aggregate function), or None if the query does not qualify.
+    """
+    if _NON_INCREMENTAL.search(_STRING_LITERAL.sub("''", query)):
+        return None
+    match = _AGGREGATE_VIEW.fullmatch(query)
+    if not match:
+        return None
+
+    def normalized(expression: str) -> str:
+        return re.sub(r"\s+", " ", expression).strip().lower()
+
+    keys = {normalized(key) for key in split_top_level(match["group"])}
+    kinds = []
+    for column in split_top_level(match["select"]):
+        expression = _VIEW_COLUMN.fullmatch(column)["expression"]
+        aggregate = _DECOMPOSABLE_AGGREGATE.fullmatch(expression)
+        if aggregate and _is_single_call(expression):
+            kinds.append(aggregate["function"].lower())
+        elif normalized(expression) in keys:
+            kinds.append("key")
+        else:
+            return None
+    if kinds.count("key") != len(keys):
+        return None
+    return {
+        "table": match["table"].strip('"'),
+        "alias": match["alias"],
+        "select": match["select"],
+        "where": match["where"],
+        "group": match["group"],
+        "kinds": kinds,
+    }
+
+
+def delta_query(view: dict[str, Any]) -> str:
+    """The query of a parsed aggregate view restricted to source rows with `? < rowid <= ?`"""
+    table = quote_identifier(view["table"])
+    source = f"(SELECT * FROM {table} WHERE rowid > ? AND rowid <= ?) AS {view['alias'] or table}"
+    where = f" WHERE {view['where']}" if view["where"] else ""
+    return f"SELECT {view['select']} FROM {source}{where} GROUP BY {view['group']}"
+
+
+def _merge_expression(kind: str, current: str, delta: str) -> str:
+    # Aggregates over no non-NULL values are NULL, so NULL on either side keeps the other
+    if kind in ("min", "max"):
+        return f"{kind}(coalesce({current}, {delta}), coalesce({delta}, {current}))"
+    return f"CASE WHEN {current} IS NULL THEN {delta} WHEN {delta} IS NULL THEN {current} ELSE {current} + {delta} END"
+
+
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def sample_table(table: str) -> str:
+    """Name of the table holding the Bernoulli sample of `table` used by sample_query"""
+    return f"_mcp_sample_{table}"
+
+
+def _estimate(value: float, variance: float) -> dict[str, Any]:
+    error = math.sqrt(max(variance, 0.0))
+    return {"estimate": value, "standard_error": error, "ci95": [value - 1.96 * error, value + 1.96 * error]}
+
+
+def bernoulli_estimates(
+    rate: float,
+    rows: int,
+    columns: dict[str, tuple[int, float, float]],
+) -> dict[str, Any]:
+    """Estimate COUNT, SUM and AVG over a whole table from a Bernoulli sample taken at `rate`.
+
+    `rows` is the number of sampled rows in the group and `columns` maps each column to the
+    count, sum and sum of squares of its non-NULL sampled values. COUNT and SUM are
+    Horvitz-Thompson estimates; AVG is the sample mean with a finite-population correction.
+    """
+    scale = 1 / rate
+    estimates: dict[str, Any] = {"count": _estimate(rows * scale, rows * (1 - rate) * scale * scale)}
+    sums, averages = {}, {}
+    for column, (count, total, squares) in columns.items():
+        sums[column] = _estimate(total * scale, squares * (1 - rate) * scale * scale)
+        if count:
+            mean = total / count
+            variance = (squares - count * mean * mean) / (count - 1) if count > 1 else 0.0
+            averages[column] = _estimate(mean, variance / count * (1 - rate))
+        else:
+            averages[column] = None
+    if columns:
+        estimates["sum"] = sums
+        estimates["avg"] = averages
+    return estimates
+
+
+def fts_table(table: str) -> str:
+    """Name of the FTS5 index that create_fts_index builds over `table`"""
+    return f"{table}_fts"
+
+
+def fts_phrase_query(text: str) -> str:
+    """Turn free text into an FTS5 query that requires every word, with no operator syntax"""
+    terms = text.split()
+    if not terms:
+        raise ValueError("Search text is empty")
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _bucket_counts(buckets: tuple[int, ...]) -> dict[str, int]:
+    return {**{f"<={bound}": 0 for bound in buckets}, f">{buckets[-1]}": 0}
+
+
+def _bucket_label(value: float, buckets: tuple[int, ...]) -> str:
+    return next((f"<={bound}" for bound in buckets if value <= bound), f">{buckets[-1]}")
+
+
+class LatencyStats:
+    """Running totals and histograms for one tool or normalized query"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.vm_steps = 0
+        self.latency_ms = _bucket_counts(LATENCY_BUCKETS_MS)
+        self.row_counts = _bucket_counts(ROW_COUNT_BUCKETS)
+
+    def add(self, elapsed_ms: float, rows: int = 0, size: int = 0, vm_steps: int = 0, error: bool = False) -> None:
+        self.count += 1
+        self.errors += error
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        self.bytes += size
+        self.vm_steps += vm_steps
+        self.latency_ms[_bucket_label(elapsed_ms, LATENCY_BUCKETS_MS)] += 1
+        self.row_counts[_bucket_label(rows, ROW_COUNT_BUCKETS)] += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "vm_steps": self.vm_steps,
+            "latency_ms": dict(self.latency_ms),
+            "row_counts": dict(self.row_counts),
+        }
+
+
+_NUMERIC_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+
+
+@functools.lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def normalize_query(query: str) -> str:
+    """Reduce a query to its shape by replacing literals with ? and collapsing whitespace"""
+    text = _STRING_LITERAL.sub("?", query)
+    text = _NUMERIC_LITERAL.sub("?", text)
+    return " ".join(text.split()).rstrip(";")
+
+
+class ServerMetrics:
+    """Per-tool and per-normalized-query latency, row and size aggregates for metrics://sqlite.
+
+    Query shapes are kept in LRU order and capped at `max_queries`. `vm_steps` counts SQLite
+    virtual machine instructions in units of PROGRESS_HANDLER_STEPS, which tracks rows scanned.
+    """
+
+    def __init__(self, max_queries: int = MAX_TRACKED_QUERIES):
+        self.max_queries = max_queries
+        self._lock = threading.Lock()
+        self._tools: dict[str, LatencyStats] = {}
+        self._queries: OrderedDict[str, LatencyStats] = OrderedDict()
+
+    def record_tool(self, name: str, elapsed_ms: float, size: int = 0, error: bool = False) -> None:
+        with self._lock:
+            self._tools.setdefault(name, LatencyStats()).add(elapsed_ms, size=size, error=error)
+
+    def record_query(self, query: str, elapsed_ms: float, rows: int = 0, size: int = 0, vm_steps: int = 0) -> None:
+        shape = normalize_query(query)
+        with self._lock:
+            stats = self._queries.pop(shape, None) or LatencyStats()
+            stats.add(elapsed_ms, rows=rows, size=size, vm_steps=vm_steps)
+            self._queries[shape] = stats
+            while len(self._queries) > self.max_queries:
+                self._queries.popitem(last=False)
+
+    def snapshot(self, top: int = 50) -> dict[str, Any]:
+        """Tool aggregates plus the `top` query shapes by total time spent"""
+        with self._lock:
+            tools = {name: stats.as_dict() for name, stats in self._tools.items()}
+            queries = sorted(self._queries.items(), key=lambda item: item[1].total_ms, reverse=True)[:top]
+            return {"tools": tools, "queries": [{"query": shape, **stats.as_dict()} for shape, stats in queries]}
+
+
 class SqliteDatabase:
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str,
+        pool_size: int | None = None,
+        pragmas: dict[str, Any] | None = None,
+        cached_statements: int = DEFAULT_CACHED_STATEMENTS,
+        read_only: bool = False,
+        query_timeout: float | None = None,
+        max_page_rows: int = DEFAULT_MAX_PAGE_ROWS,
+        max_result_bytes: int = DEFAULT_MAX_RESULT_BYTES,
+        cursor_idle_timeout: float = DEFAULT_CURSOR_IDLE_TIMEOUT,
+        result_cache_bytes: int = 0,
+        slow_query_ms: float = DEFAULT_SLOW_QUERY_MS,
+        data_dir: str | None = None,
+    ):
         self.db_path = str(Path(db_path).expanduser())
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.read_only = read_only
+        # import_file and export_query may only touch files below this directory
+        self.data_dir = Path(data_dir).expanduser().resolve() if data_dir else Path(self.db_path).resolve().parent
+        if not read_only:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        if pool_size is None:
+            pool_size = DEFAULT_READ_ONLY_POOL_SIZE if read_only else DEFAULT_POOL_SIZE
+        if pool_size < MIN_POOL_SIZE:
+            raise ValueError(f"Pool size must be at least {MIN_POOL_SIZE}")
+        if pragmas is None:
+            pragmas = resolve_pragmas("read-only" if read_only else "default")
+        self.pool = ConnectionPool(
+            self.db_path,
+            size=pool_size,
+            pragmas=pragmas,
+            cached_statements=cached_statements,
+            read_only=read_only,
+        )
+        self.query_timeout = query_timeout
+        self.max_page_rows = max_page_rows
+        self.max_result_bytes = max_result_bytes
+        # Leave at least one reader free for non-paginated tools
+        self.cursors = CursorRegistry(self.pool, max_open=pool_size - 1, idle_timeout=cursor_idle_timeout)
+        self.schema = SchemaCatalog()
+        self.result_cache = ResultCache(result_cache_bytes)
+        self.slow_queries = SlowQueryLog(slow_query_ms)
+        self.metrics = ServerMetrics()
+        # One worker per reader plus one for the writer, so a queued write never waits behind reads
+        self._executor = ThreadPoolExecutor(max_workers=pool_size + 1, thread_name_prefix="sqlite-query")
         self._init_database()
-        self.insights: list[str] = []
+        self.insights = InsightStore(self.pool)
 
     def _init_database(self):
         """Initialize connection to the SQLite database"""
         logger.debug("Initializing database connection")
-        with closing(sqlite3.connect(self.db_path)) as conn:
-            conn.row_factory = sqlite3.Row
-            conn.close()
+        # Open a connection eagerly so a bad path or PRAGMA fails at startup, not on the first tool call
+        with (self.pool.reader() if self.read_only else self.pool.writer()):
+            pass
 
-    def _synthesize_memo(self) -> str:
-        """Synthesizes business insights into a formatted memo"""
-        logger.debug(f"Synthesizing memo with {len(self.insights)} insights")
-        if not self.insights:
-            return "No business insights have been discovered yet."
+    def close(self) -> None:
+        """Stop the query executor and close all pooled connections"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.cursors.close()
+        self.pool.close()
 
-        insights = "\n".join(f"- {insight}" for insight in self.insights)
+    def _run_tracked(self, handle: QueryHandle, func: Callable[..., T], *args: Any) -> T:
+        _active_query.handle = handle
+        try:
+            return func(*args)
+        finally:
+            _active_query.handle = None
 
-        memo = "📊 Business Intelligence Memo 📊\n\n"
-        memo += "Key Insights Discovered:\n\n"
-        memo += insights
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a blocking database call on the query executor.
 
-        if len(self.insights) > 1:
-            memo += "\nSummary:\n"
-            memo += f"Analysis has revealed {len(self.insights)} key business insights that suggest opportunities for strategic optimization and growth."
+        If the call exceeds `query_timeout` or the awaiting MCP request is cancelled, the
+        statement running on its pooled connection is aborted with `Connection.interrupt()`.
+        """
+        self.cursors.evict_idle()
+        handle = QueryHandle()
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._run_tracked, handle, func, *args
+        )
+        try:
+            return await asyncio.wait_for(future, self.query_timeout)
+        except asyncio.TimeoutError:
+            handle.interrupt()
+            raise TimeoutError(f"Query exceeded the {self.query_timeout} second timeout") from None
+        except asyncio.CancelledError:
+            handle.interrupt()
+            raise
 
-        logger.debug("Generated basic memo format")
-        return memo
+    def _observe(
+        self,
+        query: str,
+        params: QueryParams | None,
+        started: float,
+        rows: int = 0,
+        size: int = 0,
+        vm_steps: int = 0,
+    ) -> None:
+        """Record a finished query in the metrics and, if it was slow, the slow-query log"""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.metrics.record_query(query, elapsed_ms, rows=rows, size=size, vm_steps=vm_steps)
+        self.slow_queries.record(query, params, elapsed_ms)
 
-    def _execute_query(self, query: str, params: dict[str, Any] | None = None) -> list[dict[str, Any]]:
+    def _read_page(
+        self,
+        query: str,
+        params: QueryParams | None = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        output_format: str = "records",
+    ) -> tuple[str, str | None]:
+        """Execute a SELECT query, or continue a previous one, and render one page of rows.
+
+        Returns the page encoded in `output_format` and an opaque cursor token for the next page,
+        or None once the result set is exhausted. Pages are capped at `max_page_rows` rows and
+        `max_result_bytes` of output. Results that fit in a single page are served from the
+        result cache, when enabled, until the database changes.
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        page_size = max(1, min(page_size, self.max_page_rows))
+        if cursor is not None or not self.result_cache.enabled:
+            return self._fetch_page(query, params, page_size, cursor, output_format)
+
+        key = ResultCache.key(query, params, output_format, page_size)
+        version = self.pool.data_version()
+        cached = self.result_cache.get(key, version)
+        if cached is not None:
+            logger.debug(f"Result cache hit for query: {query}")
+            return cached, None
+        page, next_cursor = self._fetch_page(query, params, page_size, cursor, output_format)
+        if next_cursor is None:
+            self.result_cache.put(key, version, page)
+        return page, next_cursor
+
+    def _fetch_page(
+        self,
+        query: str,
+        params: QueryParams | None,
+        page_size: int,
+        cursor: str | None,
+        output_format: str,
+    ) -> tuple[str, str | None]:
+        started = time.perf_counter()
+        if cursor is not None:
+            entry = self.cursors.take(cursor)
+            if entry.key != OpenCursor.statement_key(query, params):
+                self.cursors.release(entry)
+                raise ValueError("Cursor does not belong to this query and parameters")
+            vm_steps = entry.conn.vm_steps
+        else:
+            logger.debug(f"Executing paginated query: {query}")
+            self.cursors.make_room()
+            try:
+                conn = self.pool.acquire_reader()
+            except BaseException:
+                self.cursors.unreserve()
+                raise
+            vm_steps = conn.vm_steps
+            try:
+                with _track(conn):
+                    entry = OpenCursor(query, params, conn, conn.execute(query, params or ()))
+            except BaseException:
+                self.pool.release_reader(conn)
+                self.cursors.unreserve()
+                raise
+
+        encoder = OUTPUT_FORMATS[output_format](entry.columns)
+        try:
+            with _track(entry.conn):
+                rows, has_more = entry.fetch_page(page_size, self.max_result_bytes, encoder)
+        except BaseException:
+            self.cursors.release(entry)
+            raise
+
+        page = encoder.encode_page(rows)
+        self._observe(query, params, started, rows=len(rows), size=len(page), vm_steps=entry.conn.vm_steps - vm_steps)
+        if not has_more:
+            self.cursors.release(entry)
+            logger.debug(f"Paginated query finished with a page of {len(rows)} rows")
+            return page, None
+        logger.debug(f"Paginated query returned {len(rows)} rows, more remaining")
+        return page, self.cursors.register(entry)
+
+    async def read_page(
+        self,
+        query: str,
+        params: QueryParams | None = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        output_format: str = "records",
+    ) -> tuple[str, str | None]:
+        """Fetch and render one page of a SELECT query off the event loop"""
+        return await self.run(self._read_page, query, params, page_size, cursor, output_format)
+
+    async def execute(self, query: str, params: QueryParams | None = None) -> list[dict[str, Any]]:
+        """Execute a SQL query off the event loop"""
+        return await self.run(self._execute_query, query, params)
+
+    def _execute_query(self, query: str, params: QueryParams | None = None) -> list[dict[str, Any]]:
         """Execute a SQL query and return results as a list of dictionaries"""
         logger.debug(f"Executing query: {query}")
+        keywords = statement_keywords(query)
+        # Only SELECTs may borrow a reader: anything else (BEGIN, PRAGMA, SAVEPOINT...) can leave
+        # state behind on the connection, so it runs on the writer and is committed there
+        is_write = keywords[:1] != ("SELECT",)
+        started = time.perf_counter()
         try:
-            with closing(sqlite3.connect(self.db_path)) as conn:
-                conn.row_factory = sqlite3.Row
+            with (self.pool.writer() if is_write else self.pool.reader()) as conn:
+                vm_steps = conn.vm_steps
                 with closing(conn.cursor()) as cursor:
                     if params:
                         cursor.execute(query, params)
                     else:
                         cursor.execute(query)
 
-                    if query.strip().upper().startswith(('INSERT', 'UPDATE', 'DELETE', 'CREATE', 'DROP', 'ALTER')):
+                    if is_write:
                         conn.commit()
                         affected = cursor.rowcount
+                        self._observe(query, params, started, rows=max(affected, 0), vm_steps=conn.vm_steps - vm_steps)
+                        if keywords[:1] and keywords[0] in DDL_KEYWORDS:
+                            self.schema.invalidate()
                         logger.debug(f"Write query affected {affected} rows")
                         return [{"affected_rows": affected}]
 
-                    results = [dict(row) for row in cursor.fetchall()]
+                    columns = [column[0] for column in cursor.description or ()]
+                    results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                    self._observe(query, params, started, rows=len(results), vm_steps=conn.vm_steps - vm_steps)
                     logger.debug(f"Read query returned {len(results)} rows")
                     return results
         except Exception as e:
             logger.error(f"Database error executing query: {e}")
             raise
 
-async def main(db_path: str):
-    logger.info(f"Starting SQLite MCP Server with DB path: {db_path}")
+    def _bulk_insert(
+        self,
+        table: str,
+        columns: list[str],
+        rows: Iterable[Sequence[Any]],
+        chunk_size: int = DEFAULT_BULK_CHUNK_SIZE,
+    ) -> int:
+        """Insert rows with executemany in chunks of `chunk_size`, all inside a single transaction"""
+        if not columns:
+            raise ValueError("At least one column is required")
+        logger.debug(f"Bulk inserting into {table} in chunks of {chunk_size}")
+        with self.pool.writer() as conn:
+            inserted = self._insert_rows(conn, table, columns, rows, chunk_size)
+            conn.commit()
+        logger.debug(f"Bulk insert added {inserted} rows")
+        return inserted
+
+    @staticmethod
+    def _insert_rows(
+        conn: sqlite3.Connection,
+        table: str,
+        columns: list[str],
+        rows: Iterable[Sequence[Any]],
+        chunk_size: int,
+    ) -> int:
+        """Insert rows on `conn` with executemany in chunks, leaving the transaction open"""
+        chunk_size = max(1, chunk_size)
+        query = (
+            f"INSERT INTO {quote_identifier(table)} ({', '.join(quote_identifier(c) for c in columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})"
+        )
+        inserted = 0
+        rows = iter(rows)
+        while chunk := list(itertools.islice(rows, chunk_size)):
+            for offset, row in enumerate(chunk, start=inserted + 1):
+                if len(row) != len(columns):
+                    raise ValueError(f"Row {offset} has {len(row)} values, expected {len(columns)}")
+            conn.executemany(query, chunk)
+            inserted += len(chunk)
+        return inserted
+
+    def _data_path(self, path: str) -> Path:
+        """Resolve a file path relative to `data_dir`, refusing anything outside of it"""
+        resolved = (self.data_dir / Path(path).expanduser()).resolve()
+        if not resolved.is_relative_to(self.data_dir):
+            raise ValueError(f"Path {path} is outside the data directory {self.data_dir}")
+        return resolved
+
+    def _import_file(
+        self,
+        path: str,
+        table: str,
+        format: str | None = None,
+        create: bool = True,
+        chunk_size: int = DEFAULT_BULK_CHUNK_SIZE,
+    ) -> dict[str, Any]:
+        """Stream a CSV or JSONL file into `table` in one transaction.
+
+        CSV files must start with a header line. JSONL files hold one object per line and take
+        their columns from the keys of the first rows. A missing table is created with column
+        types inferred from the first `TYPE_INFERENCE_ROWS` rows.
+        """
+        file_path = self._data_path(path)
+        format = file_format(file_path, format)
+        logger.debug(f"Importing {format} file {file_path} into {table}")
+        with open(file_path, newline="", encoding="utf-8") as file:
+            if format == "csv":
+                reader = csv.reader(file)
+                columns = next(reader, None)
+                if not columns:
+                    raise ValueError("CSV file has no header line")
+                rows: Iterator[tuple[Any, ...]] = (tuple(parse_csv_value(value) for value in row) for row in reader)
+                sample = list(itertools.islice(rows, TYPE_INFERENCE_ROWS))
+            else:
+                records = _iter_json_lines(file)
+                head = list(itertools.islice(records, TYPE_INFERENCE_ROWS))
+                columns = list(dict.fromkeys(key for record in head for key in record))
+                if not columns:
+                    raise ValueError("JSONL file has no records")
+                sample = [_json_row(record, columns) for record in head]
+                rows = (_json_row(record, columns) for record in records)
+
+            with self.pool.writer() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+                ).fetchone()
+                if not exists:
+                    if not create:
+                        raise ValueError(f"Table {table} does not exist")
+                    definitions = ", ".join(
+                        f"{quote_identifier(column)} {infer_column_type(row[index] for row in sample if index < len(row))}"
+                        for index, column in enumerate(columns)
+                    )
+                    conn.execute(f"CREATE TABLE {quote_identifier(table)} ({definitions})")
+                inserted = self._insert_rows(conn, table, columns, itertools.chain(sample, rows), chunk_size)
+                conn.commit()
+        if not exists:
+            self.schema.invalidate()
+        logger.debug(f"Imported {inserted} rows into {table}")
+        return {"table": table, "columns": columns, "inserted_rows": inserted, "created": not exists}
+
+    async def import_file(
+        self,
+        path: str,
+        table: str,
+        format: str | None = None,
+        create: bool = True,
+        chunk_size: int = DEFAULT_BULK_CHUNK_SIZE,
+    ) -> dict[str, Any]:
+        """Import a data file off the event loop"""
+        return await self.run(self._import_file, path, table, format, create, chunk_size)
+
+    def _export_query(
+        self,
+        query: str,
+        path: str,
+        params: QueryParams | None = None,
+        format: str | None = None,
+        overwrite: bool = False,
+    ) -> dict[str, Any]:
+        """Stream the result of a SELECT query to a CSV or JSONL file, one fetch batch at a time"""
+        # Anything else would run on a pooled reader, e.g. VACUUM INTO writing outside data_dir
+        if statement_keywords(query)[:1] != ("SELECT",):
+            raise ValueError("Only SELECT queries can be exported")
+        file_path = self._data_path(path)
+        format = file_format(file_path, format)
+        logger.debug(f"Exporting query to {format} file {file_path}: {query}")
+        started = time.perf_counter()
+        rows = 0
+        with self.pool.reader() as conn:
+            vm_steps = conn.vm_steps
+            with closing(conn.execute(query, params or ())) as cursor:
+                encoder = OUTPUT_FORMATS[format]([column[0] for column in cursor.description or ()])
+                # CSV rows carry their own line terminator, JSON lines do not
+                terminator = "" if format == "csv" else "\n"
+                try:
+                    with open(file_path, "w" if overwrite else "x", newline="", encoding="utf-8") as file:
+                        if format == "csv":
+                            file.write(encoder.encode_row(tuple(encoder.columns)))
+                        while batch := cursor.fetchmany(FETCH_BATCH_SIZE):
+                            file.writelines(encoder.encode_row(row) + terminator for row in batch)
+                            rows += len(batch)
+                except FileExistsError:
+                    raise ValueError(f"File {path} already exists; pass overwrite=true to replace it") from None
+                except BaseException:
+                    file_path.unlink(missing_ok=True)
+                    raise
+            size = file_path.stat().st_size
+            self._observe(query, params, started, rows=rows, size=size, vm_steps=conn.vm_steps - vm_steps)
+        logger.debug(f"Exported {rows} rows to {file_path}")
+        return {"path": str(file_path), "rows": rows, "bytes": size}
+
+    async def export_query(
+        self,
+        query: str,
+        path: str,
+        params: QueryParams | None = None,
+        format: str | None = None,
+        overwrite: bool = False,
+    ) -> dict[str, Any]:
+        """Export a query result off the event loop"""
+        return await self.run(self._export_query, query, path, params, format, overwrite)
+
+    async def bulk_insert(
+        self,
+        table: str,
+        columns: list[str],
+        rows: Iterable[Sequence[Any]],
+        chunk_size: int = DEFAULT_BULK_CHUNK_SIZE,
+    ) -> int:
+        """Bulk insert rows off the event loop"""
+        return await self.run(self._bulk_insert, table, columns, rows, chunk_size)
+
+    def _execute_batch(self, statements: list[dict[str, Any]], on_error: str = "rollback") -> list[dict[str, Any]]:
+        """Run write statements in order inside one BEGIN IMMEDIATE ... COMMIT transaction.
+
+        Each statement runs under its own savepoint. With on_error="rollback" the first failure
+        rolls back the whole batch; with on_error="continue" only the failing statement is undone
+        and its error is reported in place of a row count.
+        """
+        if on_error not in ("rollback", "continue"):
+            raise ValueError(f"Unknown on_error mode: {on_error}")
+        for index, statement in enumerate(statements, start=1):
+            if not is_write_statement(statement["query"]):
+                raise ValueError(f"Statement {index} is not a write statement")
+
+        logger.debug(f"Executing batch of {len(statements)} statements")
+        results: list[dict[str, Any]] = []
+        with self.pool.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for index, statement in enumerate(statements, start=1):
+                conn.execute("SAVEPOINT batch_statement")
+                try:
+                    cursor = conn.execute(statement["query"], statement.get("params") or ())
+                except sqlite3.Error as e:
+                    conn.execute("ROLLBACK TO batch_statement")
+                    conn.execute("RELEASE batch_statement")
+                    if on_error == "rollback":
+                        conn.rollback()
+                        raise type(e)(f"Statement {index} failed, batch rolled back: {e}") from e
+                    results.append({"error": str(e)})
+                    continue
+                conn.execute("RELEASE batch_statement")
+                results.append({"affected_rows": cursor.rowcount})
+            conn.commit()
+        if any(statement_keywords(statement["query"])[0] in DDL_KEYWORDS for statement in statements):
+            self.schema.invalidate()
+        logger.debug(f"Batch committed with results {results}")
+        return results
+
+    def _describe_schema(self, row_counts: bool = False) -> dict[str, dict[str, Any]]:
+        """Return the cached schema catalog of user tables and views, optionally with fresh
+        row-count estimates per table"""
+        with self.pool.reader() as conn:
+            catalog = self.schema.visible(conn)
+            if not row_counts:
+                return catalog
+            return {
+                name: {**info, "row_estimate": estimate_row_count(conn, name) if info["type"] == "table" else None}
+                for name, info in catalog.items()
+            }
+
+    async def describe_schema(self, row_counts: bool = False) -> dict[str, dict[str, Any]]:
+        """Fetch the schema catalog off the event loop"""
+        return await self.run(self._describe_schema, row_counts)
+
+    def _explain_query(self, query: str, params: QueryParams | None = None) -> dict[str, Any]:
+        """Return the annotated `EXPLAIN QUERY PLAN` tree for a statement without running it.
+
+        Missing parameter values are bound as NULL, which is enough for planning.
+        """
+        if params is None:
+            params = null_params(query)
+        aliases = table_aliases(query)
+        with self.pool.reader() as conn:
+            # EXPLAIN never opens a read transaction, so by itself it neither reloads a schema changed
+            # by another connection nor expires cached statements. Touch sqlite_master to reload the
+            # schema, and key the statement text on the schema version to skip stale cached plans.
+            conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+            version = conn.execute("PRAGMA schema_version").fetchone()[0]
+            plan = conn.execute(f"/* schema_version {version} */ EXPLAIN QUERY PLAN {query}", params).fetchall()
+            catalog = self.schema.get(conn)
+            tables = {
+                aliases.get(match["table"].lower(), match["table"])
+                for _, _, _, detail in plan
+                if (match := _PLAN_DETAIL.match(detail))
+            }
+            estimates = {table: estimate_row_count(conn, table) for table in tables if table in catalog}
+        return parse_query_plan(plan, estimates, aliases)
+
+    async def explain_query(self, query: str, params: QueryParams | None = None) -> dict[str, Any]:
+        """Explain a query off the event loop"""
+        return await self.run(self._explain_query, query, params)
+
+    def _suggest_indexes(self, query: str | None = None, create: bool = False) -> list[dict[str, Any]]:
+        """Suggest indexes that turn full table scans into index searches.
+
+        Looks at `query`, or at every query in the slow-query log when none is given. With
+        `create=True` the suggested indexes are built and the query plan is re-checked.
+        """
+        if create and self.read_only:
+            raise ValueError("Cannot create indexes on a read-only database")
+        candidates = [(query, None)] if query else [(entry["query"], entry["params"]) for entry in self.slow_queries.entries()]
+        suggestions: list[dict[str, Any]] = []
+        for text, params in candidates:
+            try:
+                plan = self._explain_query(text, params)
+            except sqlite3.Error as e:
+                logger.debug(f"Cannot explain {text!r} for index advice: {e}")
+                continue
+            catalog = self._describe_schema()
+            for node in iter_plan_nodes(plan["plan"]):
+                info = catalog.get(node.get("table", ""))
+                if node.get("operation") != "SCAN" or not info or info["type"] != "table":
+                    continue
+                columns = suggest_index(text, node["table"], [column["name"] for column in info["columns"]])
+                if not columns:
+                    continue
+                name = f"idx_{node['table']}_{'_'.join(columns)}"
+                statement = (
+                    f"CREATE INDEX IF NOT EXISTS {quote_identifier(name)} ON {quote_identifier(node['table'])} "
+                    f"({', '.join(quote_identifier(column) for column in columns)})"
+                )
+                if any(suggestion["statement"] == statement for suggestion in suggestions):
+                    continue
+                suggestions.append({
+                    "query": text,
+                    "table": node["table"],
+                    "columns": columns,
+                    "statement": statement,
+                    "estimated_cost": plan["estimated_cost"],
+                })
+
+        if create:
+            for suggestion in suggestions:
+                self._execute_query(suggestion["statement"])
+            for suggestion in suggestions:
+                try:
+                    suggestion["estimated_cost_after"] = self._explain_query(suggestion["query"])["estimated_cost"]
+                except sqlite3.Error:
+                    pass
+        return suggestions
+
+    async def suggest_indexes(self, query: str | None = None, create: bool = False) -> list[dict[str, Any]]:
+        """Run the index advisor off the event loop"""
+        return await self.run(self._suggest_indexes, query, create)
+
+    async def execute_batch(self, statements: list[dict[str, Any]], on_error: str = "rollback") -> list[dict[str, Any]]:
+        """Run a transactional batch off the event loop"""
+        return await self.run(self._execute_batch, statements, on_error)
+
+    @staticmethod
+    def _ensure_views_table(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {VIEWS_TABLE} ("
+            "name TEXT PRIMARY KEY, query TEXT NOT NULL, source TEXT, watermark INTEGER, "
+            "stale INTEGER NOT NULL DEFAULT 0, refreshed_at TEXT)"
+        )
+
+    @staticmethod
+    def _create_view_triggers(conn: sqlite3.Connection, name: str, source: str) -> None:
+        """Mark the view stale when rows it has already aggregated are changed, or when a row is
+        inserted below its watermark, since the next delta refresh would miss either"""
+        literal = _sql_literal(name)
+        watermark = f"(SELECT watermark FROM {VIEWS_TABLE} WHERE name = {literal} AND NOT stale)"
+        conditions = {
+            "INSERT": f"NEW.rowid <= {watermark}",
+            "UPDATE": f"OLD.rowid <= {watermark} OR NEW.rowid <= {watermark}",
+            "DELETE": f"OLD.rowid <= {watermark}",
+        }
+        for event, condition in conditions.items():
+            conn.execute(
+                f"CREATE TRIGGER {quote_identifier(f'_mcp_view_{name}_{event.lower()}')} "
+                f"AFTER {event} ON {quote_identifier(source)} WHEN {condition} "
+                f"BEGIN UPDATE {VIEWS_TABLE} SET stale = 1 WHERE name = {literal}; END"
+            )
+
+    def _create_materialized_view(self, name: str, query: str) -> dict[str, Any]:
+        """Store the result of a SELECT query in a new table that `refresh_view` keeps up to date.
+
+        Single-table GROUP BY queries whose aggregates are all COUNT, SUM, TOTAL, MIN or MAX are
+        refreshed incrementally: only source rows appended past the rowid watermark of the last
+        refresh are aggregated and merged into the table. Any other query is recomputed in full.
+        """
+        query = query.strip().rstrip(";")
+        if statement_keywords(query)[:1] not in (("SELECT",), ("WITH",)):
+            raise ValueError("A materialized view must be defined by a SELECT query")
+        view = parse_aggregate_view(query)
+        target = quote_identifier(name)
+        logger.debug(f"Creating materialized view {name} ({'incremental' if view else 'full refresh'}): {query}")
+        with self.pool.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._ensure_views_table(conn)
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE lower(name) = lower(?)", (name,)).fetchone():
+                raise ValueError(f"{name} already exists")
+            watermark = None
+            if view is not None:
+                try:
+                    watermark = conn.execute(
+                        f"SELECT coalesce(max(rowid), 0) FROM {quote_identifier(view['table'])}"
+                    ).fetchone()[0]
+                except sqlite3.OperationalError:
+                    view = None  # a view or WITHOUT ROWID table has no rowid watermark
+            conn.execute(f"CREATE TABLE {target} AS {query}")
+            if view is not None:
+                self._create_view_triggers(conn, name, view["table"])
+            conn.execute(
+                f"INSERT INTO {VIEWS_TABLE} (name, query, source, watermark, refreshed_at) "
+                "VALUES (?, ?, ?, ?, datetime('now'))",
+                (name, query, view and view["table"], watermark),
+            )
+            rows = conn.execute(f"SELECT count(*) FROM {target}").fetchone()[0]
+            conn.commit()
+        self.schema.invalidate()
+        return {"name": name, "incremental": view is not None, "rows": rows}
+
+    async def create_materialized_view(self, name: str, query: str) -> dict[str, Any]:
+        """Create a materialized view off the event loop"""
+        return await self.run(self._create_materialized_view, name, query)
+
+    def _refresh_view(self, name: str | None = None, full: bool = False) -> list[dict[str, Any]]:
+        """Bring one materialized view, or all of them, up to date in a single transaction.
+
+        A view is recomputed in full if it is not incremental, if `full` is set, or if its source
+        table saw an UPDATE, DELETE or out-of-order INSERT since the last refresh.
+        """
+        with self.pool.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._ensure_views_table(conn)
+            views = conn.execute(
+                f"SELECT name, query, source, watermark, stale FROM {VIEWS_TABLE}"
+                + (" WHERE name = ?" if name else " ORDER BY name"),
+                (name,) if name else (),
+            ).fetchall()
+            if name and not views:
+                raise ValueError(f"No materialized view named {name}")
+            results = [self._refresh_one_view(conn, *view, full=full) for view in views]
+            conn.commit()
+        logger.debug(f"Refreshed materialized views: {results}")
+        return results
+
+    @staticmethod
+    def _refresh_one_view(
+        conn: sqlite3.Connection,
+        name: str,
+        query: str,
+        source: str | None,
+        watermark: int | None,
+        stale: int,
+        full: bool,
+    ) -> dict[str, Any]:
+        target = quote_identifier(name)
+        view = parse_aggregate_view(query) if source else None
+        high = None
+        if view is not None:
+            high = conn.execute(f"SELECT coalesce(max(rowid), 0) FROM {quote_identifier(source)}").fetchone()[0]
+
+        if view is None or stale or full:
+            conn.execute(f"DELETE FROM {target}")
+            changed = conn.execute(f"INSERT INTO {target} {query}").rowcount
+            mode = "full"
+        elif high <= watermark:
+            changed, mode = 0, "unchanged"
+        else:
+            # Aggregate only the appended rows, then merge them group by group: existing groups
+            # combine their aggregates and new groups are inserted
+            delta = "_mcp_view_delta"
+            conn.execute(f"CREATE TEMP TABLE {delta} AS {delta_query(view)}", (watermark, high))
+            # Pair the columns by position, in case the delta query names them differently
+            columns = [
+                (quote_identifier(current[1]), f"{delta}.{quote_identifier(added[1])}", kind)
+                for current, added, kind in zip(
+                    conn.execute(f"PRAGMA table_info({target})").fetchall(),
+                    conn.execute(f"PRAGMA temp.table_info({delta})").fetchall(),
+                    view["kinds"],
+                )
+            ]
+            match = " AND ".join(f"{added} IS {target}.{column}" for column, added, kind in columns if kind == "key")
+            assignments = ", ".join(
+                f"{column} = (SELECT {_merge_expression(kind, f'{target}.{column}', added)} FROM {delta} WHERE {match})"
+                for column, added, kind in columns
+                if kind != "key"
+            )
+            conn.execute(f"UPDATE {target} SET {assignments} WHERE EXISTS (SELECT 1 FROM {delta} WHERE {match})")
+            conn.execute(f"INSERT INTO {target} SELECT * FROM {delta} WHERE NOT EXISTS (SELECT 1 FROM {target} WHERE {match})")
+            changed = conn.execute(f"SELECT count(*) FROM {delta}").fetchone()[0]
+            conn.execute(f"DROP TABLE {delta}")
+            mode = "incremental"
+
+        conn.execute(
+            f"UPDATE {VIEWS_TABLE} SET watermark = ?, stale = 0, refreshed_at = datetime('now') WHERE name = ?",
+            (high, name),
+        )
+        return {"name": name, "mode": mode, "changed_rows": changed}
+
+    async def refresh_view(self, name: str | None = None, full: bool = False) -> list[dict[str, Any]]:
+        """Refresh materialized views off the event loop"""
+        return await self.run(self._refresh_view, name, full)
+
+    def _create_fts_index(self, table: str, columns: list[str], tokenize: str | None = None) -> dict[str, Any]:
+        """Build an external-content FTS5 index over `columns` of `table`.
+
+        The index stores only the token index, not a copy of the text, and is kept in sync by
+        INSERT, UPDATE and DELETE triggers on the table.
+        """
+        if not columns:
+            raise ValueError("At least one column is required")
+        with self.pool.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            catalog = self.schema.get(conn)
+            info = find_schema_object(catalog, table)
+            if info is None or info["type"] != "table":
+                raise ValueError(f"Unknown table: {table}")
+            table = next(name for name, value in catalog.items() if value is info)
+            known = {column["name"].lower(): column for column in info["columns"]}
+            missing = [column for column in columns if column.lower() not in known]
+            if missing:
+                raise ValueError(f"Unknown columns: {', '.join(missing)}")
+            columns = [known[column.lower()]["name"] for column in columns]
+            # An INTEGER PRIMARY KEY is the rowid, so the index can point straight at it
+            keys = [column for column in info["columns"] if column["pk"]]
+            rowid = keys[0]["name"] if len(keys) == 1 and keys[0]["type"].upper() == "INTEGER" else "rowid"
+
+            index = fts_table(table)
+            options = [f"content={_sql_literal(table)}", f"content_rowid={_sql_literal(rowid)}"]
+            if tokenize:
+                options.append(f"tokenize={_sql_literal(tokenize)}")
+            column_list = ", ".join(quote_identifier(column) for column in columns)
+            logger.debug(f"Creating FTS5 index {index} over {table}({', '.join(columns)})")
+            conn.execute(f"CREATE VIRTUAL TABLE {quote_identifier(index)} USING fts5({column_list}, {', '.join(options)})")
+
+            def values(row: str) -> str:
+                return ", ".join([f"{row}.{quote_identifier(rowid)}", *(f"{row}.{quote_identifier(c)}" for c in columns)])
+
+            insert = f"INSERT INTO {quote_identifier(index)} (rowid, {column_list}) VALUES ({values('new')});"
+            delete = (
+                f"INSERT INTO {quote_identifier(index)} ({quote_identifier(index)}, rowid, {column_list}) "
+                f"VALUES ('delete', {values('old')});"
+            )
+            watched = ", ".join(quote_identifier(column) for column in dict.fromkeys([*columns, *(() if rowid == "rowid" else (rowid,))]))
+            for suffix, event, body in (
+                ("ai", "INSERT", insert),
+                ("ad", "DELETE", delete),
+                ("au", f"UPDATE OF {watched}", delete + " " + insert),
+            ):
+                conn.execute(
+                    f"CREATE TRIGGER {quote_identifier(f'{index}_{suffix}')} AFTER {event} ON {quote_identifier(table)} "
+                    f"BEGIN {body} END"
+                )
+            conn.execute(f"INSERT INTO {quote_identifier(index)} ({quote_identifier(index)}) VALUES ('rebuild')")
+            rows = conn.execute(f"SELECT count(*) FROM {quote_identifier(table)}").fetchone()[0]
+            conn.commit()
+        self.schema.invalidate()
+        return {"index": index, "table": table, "columns": columns, "indexed_rows": rows}
 
-    db = SqliteDatabase(db_path)
+    async def create_fts_index(self, table: str, columns: list[str], tokenize: str | None = None) -> dict[str, Any]:
+        """Build a full-text index off the event loop"""
+        return await self.run(self._create_fts_index, table, columns, tokenize)
+
+    def _search_text(
+        self,
+        table: str,
+        text: str,
+        columns: list[str] | None = None,
+        advanced: bool = False,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        output_format: str = "records",
+    ) -> tuple[str, str | None]:
+        """Search the FTS5 index of `table`, best bm25 matches first.
+
+        Every row carries a `snippet` of its best matching column, with the matched terms
+        wrapped in `**`, and its `rank` (lower is better). Pages and cursors work as in
+        `_read_page`.
+        """
+        with self.pool.reader() as conn:
+            catalog = self.schema.get(conn)
+        info = find_schema_object(catalog, fts_table(table))
+        if info is None:
+            raise ValueError(f"Table {table} has no full-text index; create one with create_fts_index")
+        index = quote_identifier(next(name for name, value in catalog.items() if value is info))
+        selected = ", ".join(f"t.{quote_identifier(column)}" for column in columns) if columns else "t.*"
+        query = (
+            f"SELECT {selected}, snippet({index}, -1, '**', '**', '…', {FTS_SNIPPET_TOKENS}) AS snippet, "
+            f"bm25({index}) AS rank "
+            f"FROM {index} JOIN {quote_identifier(table)} AS t ON t.rowid = {index}.rowid "
+            f"WHERE {index} MATCH ? ORDER BY rank"
+        )
+        return self._read_page(
+            query, [text if advanced else fts_phrase_query(text)], page_size, cursor, output_format
+        )
+
+    async def search_text(
+        self,
+        table: str,
+        text: str,
+        columns: list[str] | None = None,
+        advanced: bool = False,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        output_format: str = "records",
+    ) -> tuple[str, str | None]:
+        """Run a full-text search off the event loop"""
+        return await self.run(
+            self._search_text, table, text, columns, advanced, page_size, cursor, output_format
+        )
+
+    def _refresh_sample(self, table: str, rate: float | None, resample: bool) -> tuple[str, float]:
+        """Create, rebuild or top up the Bernoulli sample of `table` and return its name and rate.
+
+        A new sample takes one full scan of the table. After that only rows appended past the
+        rowid watermark are sampled, so keeping the sample current is cheap. Updates and deletes
+        of already sampled rows are not tracked; `resample` rebuilds the sample from scratch.
+        """
+        sample = quote_identifier(sample_table(table))
+        source = quote_identifier(table)
+        if self.read_only:
+            existing = None
+            with self.pool.reader() as conn:
+                if find_schema_object(self.schema.get(conn), SAMPLES_TABLE):
+                    existing = conn.execute(f"SELECT rate FROM {SAMPLES_TABLE} WHERE source = ?", (table,)).fetchone()
+            if existing is None or resample or rate not in (None, existing[0]):
+                raise ValueError("Samples cannot be built on a read-only database")
+            return sample_table(table), existing[0]
+
+        with self.pool.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {SAMPLES_TABLE} ("
+                "source TEXT PRIMARY KEY, rate REAL NOT NULL, watermark INTEGER NOT NULL, sampled_at TEXT)"
+            )
+            existing = conn.execute(f"SELECT rate, watermark FROM {SAMPLES_TABLE} WHERE source = ?", (table,)).fetchone()
+            if existing and (resample or rate not in (None, existing[0])):
+                conn.execute(f"DROP TABLE IF EXISTS {sample}")
+                existing = None
+            rate = rate or (existing[0] if existing else DEFAULT_SAMPLE_RATE)
+            watermark = existing[1] if existing else 0
+            high = conn.execute(f"SELECT coalesce(max(rowid), 0) FROM {source}").fetchone()[0]
+            keep = f"(random() & {SAMPLE_RESOLUTION - 1}) < {round(rate * SAMPLE_RESOLUTION)}"
+            if existing is None:
+                logger.debug(f"Sampling {table} at rate {rate}")
+                conn.execute(f"CREATE TABLE {sample} AS SELECT * FROM {source} WHERE rowid <= ? AND {keep}", (high,))
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {SAMPLES_TABLE} (source, rate, watermark, sampled_at) "
+                    "VALUES (?, ?, ?, datetime('now'))",
+                    (table, rate, high),
+                )
+            elif high > watermark:
+                conn.execute(
+                    f"INSERT INTO {sample} SELECT * FROM {source} WHERE rowid > ? AND rowid <= ? AND {keep}",
+                    (watermark, high),
+                )
+                conn.execute(f"UPDATE {SAMPLES_TABLE} SET watermark = ? WHERE source = ?", (high, table))
+            conn.commit()
+        if existing is None:
+            self.schema.invalidate()
+        return sample_table(table), rate
+
+    def _sample_query(
+        self,
+        table: str,
+        columns: list[str] | None = None,
+        where: str | None = None,
+        group_by: list[str] | None = None,
+        rate: float | None = None,
+        resample: bool = False,
+    ) -> dict[str, Any]:
+        """Estimate COUNT, and SUM and AVG of `columns`, per group from the table's sample.
+
+        Every estimate comes with its standard error and a 95% confidence interval.
+        """
+        if rate is not None and not 0 < rate <= 1:
+            raise ValueError("rate must be greater than 0 and at most 1")
+        with self.pool.reader() as conn:
+            catalog = self.schema.get(conn)
+        info = find_schema_object(catalog, table)
+        if info is None or info["type"] != "table":
+            raise ValueError(f"Unknown table: {table}")
+        table = next(name for name, value in catalog.items() if value is info)
+        known = {column["name"].lower() for column in info["columns"]}
+        unknown = [column for column in [*(columns or []), *(group_by or [])] if column.lower() not in known]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+        sample, rate = self._refresh_sample(table, rate, resample)
+        keys = [quote_identifier(column) for column in group_by or []]
+        measures = [
+            f"count({column}), total({column}), total({column} * {column})"
+            for column in map(quote_identifier, columns or [])
+        ]
+        query = f"SELECT {', '.join([*keys, 'count(*)', *measures])} FROM {quote_identifier(sample)}"
+        if where:
+            query += f" WHERE {where}"
+        if keys:
+            query += f" GROUP BY {', '.join(keys)} ORDER BY count(*) DESC LIMIT {self.max_page_rows}"
+        started = time.perf_counter()
+        with self.pool.reader() as conn:
+            rows = conn.execute(query).fetchall()
+        self._observe(query, None, started, rows=len(rows))
+
+        groups = []
+        for row in rows:
+            values = row[len(keys) + 1:]
+            stats = {column: tuple(values[3 * index:3 * index + 3]) for index, column in enumerate(columns or [])}
+            group = {
+                "sample_rows": row[len(keys)],
+                **bernoulli_estimates(rate, row[len(keys)], stats),
+            }
+            if keys:
+                group = {"group": dict(zip(group_by, row[:len(keys)])), **group}
+            groups.append(group)
+        return {"table": table, "rate": rate, "approximate": rate < 1, "groups": groups}
+
+    async def sample_query(
+        self,
+        table: str,
+        columns: list[str] | None = None,
+        where: str | None = None,
+        group_by: list[str] | None = None,
+        rate: float | None = None,
+        resample: bool = False,
+    ) -> dict[str, Any]:
+        """Estimate aggregates from a sample off the event loop"""
+        return await self.run(self._sample_query, table, columns, where, group_by, rate, resample)
+
+
+_DATABASE_ALIAS = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+class DatabaseRegistry:
+    """The databases served by one server process, by alias.
+
+    Every database has its own SqliteDatabase and so its own connection pool, PRAGMAs and
+    caches. Each one is also ATTACHed to the main database's connections under its alias, so
+    queries on the main database can join across databases as `alias.table`.
+    """
+
+    def __init__(self, main: SqliteDatabase, **db_options: Any):
+        self.main = main
+        # SqliteDatabase options for attached databases, normally the ones the main one was opened with
+        self.db_options = db_options
+        self._lock = threading.Lock()
+        self._databases: dict[str, SqliteDatabase] = {MAIN_DATABASE: main}
+
+    def get(self, name: str | None = None) -> SqliteDatabase:
+        """Return the database with alias `name`, or the main database if no name is given"""
+        database = self._databases.get(name or MAIN_DATABASE)
+        if database is None:
+            raise ValueError(f"Unknown database: {name}")
+        return database
+
+    def items(self) -> list[tuple[str, SqliteDatabase]]:
+        return list(self._databases.items())
+
+    def attach(
+        self,
+        alias: str,
+        path: str,
+        profile: str | None = None,
+        read_only: bool = False,
+        **db_options: Any,
+    ) -> SqliteDatabase:
+        """Open another database under `alias`.
+
+        It uses the PRAGMAs of `profile`, or else those of the main database, and `db_options`
+        on top of the registry's own. If the main database is read-only, so is every other one.
+        """
+        if not _DATABASE_ALIAS.fullmatch(alias) or alias.lower() in (MAIN_DATABASE, "temp"):
+            raise ValueError(f"Invalid database alias: {alias}")
+        db_options = {**self.db_options, **db_options, "read_only": read_only or self.main.read_only}
+        if profile is not None:
+            db_options["pragmas"] = resolve_pragmas(profile)
+        elif db_options["read_only"] and not self.main.read_only:
+            # WAL PRAGMAs meant for a writable main database do not suit an immutable one
+            db_options.pop("pragmas", None)
+        with self._lock:
+            if any(alias.lower() == name.lower() for name in self._databases):
+                raise ValueError(f"Database {alias} is already attached")
+            if len(self._databases) > MAX_ATTACHED_DATABASES:
+                raise ValueError(f"At most {MAX_ATTACHED_DATABASES} databases can be attached")
+            database = SqliteDatabase(path, **db_options)
+            try:
+                self.main.pool.attach(alias, database.db_path, read_only=database.read_only)
+            except BaseException:
+                database.close()
+                raise
+            self._databases[alias] = database
+        logger.info(f"Attached database {alias} at {database.db_path}")
+        return database
+
+    def describe(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "name": name,
+                "path": database.db_path,
+                "read_only": database.read_only,
+                "pool_size": database.pool.size,
+                "pragmas": database.pool.pragmas,
+            }
+            for name, database in self.items()
+        ]
+
+    def close(self) -> None:
+        for database in self._databases.values():
+            database.close()
+
+
+def create_server(databases: DatabaseRegistry) -> Server:
+    """Build the MCP server, with all its handlers, on top of the given databases"""
+    db = databases.main
     server = Server("sqlite-manager")
 
     # Register handlers
@@ -177,24 +2427,55 @@ async def main(db_path: str):
             types.Resource(
                 uri=AnyUrl("memo://insights"),
                 name="Business Insights Memo",
-                description="A living document of discovered business insights",
+                description="A living document of discovered business insights; read memo://insights?since=<id>&limit=<n> to page through all of them",
                 mimeType="text/plain",
-            )
+            ),
+            types.Resource(
+                uri=AnyUrl("metrics://sqlite"),
+                name="SQLite Server Metrics",
+                description="Per-tool and per-query latency, rows and response size, slow queries and result cache counters",
+                mimeType="application/json",
+            ),
         ]
 
     @server.read_resource()
     async def handle_read_resource(uri: AnyUrl) -> str:
         logger.debug(f"Handling read_resource request for URI: {uri}")
+        if str(uri) == "metrics://sqlite":
+            def database_metrics(database: SqliteDatabase) -> dict[str, Any]:
+                return {
+                    **database.metrics.snapshot(),
+                    "slow_queries": database.slow_queries.entries(),
+                    "result_cache": database.result_cache.stats(),
+                }
+
+            return json.dumps({
+                **database_metrics(db),
+                "databases": {name: database_metrics(database) for name, database in databases.items() if database is not db},
+            }, default=repr)
+
         if uri.scheme != "memo":
             logger.error(f"Unsupported URI scheme: {uri.scheme}")
             raise ValueError(f"Unsupported URI scheme: {uri.scheme}")
 
-        path = str(uri).replace("memo://", "")
-        if not path or path != "insights":
+        path = uri.host or ""
+        if path != "insights":
             logger.error(f"Unknown resource path: {path}")
             raise ValueError(f"Unknown resource path: {path}")
 
-        return db._synthesize_memo()
+        query = parse_qs(uri.query or "")
+        if not query:
+            return db.insights.memo()
+        try:
+            since = int(query.get("since", ["0"])[0])
+            limit = int(query.get("limit", [str(DEFAULT_INSIGHTS_PAGE)])[0])
+        except ValueError:
+            raise ValueError("since and limit must be integers") from None
+        insights, next_since = await asyncio.to_thread(db.insights.page, since, limit)
+        text = "\n".join(f"- [{insight_id}] {insight}" for insight_id, insight in insights) or "No more insights."
+        if next_since is not None:
+            text += f"\n\nMore insights available: read memo://insights?since={next_since}&limit={limit}"
+        return text
 
     @server.list_prompts()
     async def handle_list_prompts() -> list[types.Prompt]:
@@ -240,8 +2521,8 @@ async def main(db_path: str):
 
     @server.list_tools()
     async def handle_list_tools() -> list[types.Tool]:
-        """List available tools"""
-        return [
+        """List available tools, leaving out the write tools in read-only mode"""
+        tools = [
             types.Tool(
                 name="read_query",
                 description="Execute a SELECT query on the SQLite database",
@@ -249,6 +2530,24 @@ async def main(db_path: str):
                     "type": "object",
                     "properties": {
                         "query": {"type": "string", "description": "SELECT SQL query to execute"},
+                        "params": {
+                            "type": ["array", "object"],
+                            "description": "Values for ? (array) or :name (object) placeholders in the query",
+                        },
+                        "page_size": {
+                            "type": "integer",
+                            "description": f"Maximum number of rows to return (default {DEFAULT_PAGE_SIZE})",
+                            "minimum": 1,
+                        },
+                        "cursor": {
+                            "type": "string",
+                            "description": "Cursor returned by a previous call with the same query and params, to fetch the next page",
+                        },
+                        "output_format": {
+                            "type": "string",
+                            "enum": list(OUTPUT_FORMATS),
+                            "description": "records (list of objects, default), columnar (column names once, rows as arrays), csv or jsonl",
+                        },
                     },
                     "required": ["query"],
                 },
@@ -260,6 +2559,10 @@ async def main(db_path: str):
                     "type": "object",
                     "properties": {
                         "query": {"type": "string", "description": "SQL query to execute"},
+                        "params": {
+                            "type": ["array", "object"],
+                            "description": "Values for ? (array) or :name (object) placeholders in the query",
+                        },
                     },
                     "required": ["query"],
                 },
@@ -275,6 +2578,117 @@ async def main(db_path: str):
                     "required": ["query"],
                 },
             ),
+            types.Tool(
+                name="bulk_insert",
+                description="Insert many rows into a table in a single transaction",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "table": {"type": "string", "description": "Name of the table to insert into"},
+                        "columns": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Columns to insert; may be omitted when csv has a header line",
+                        },
+                        "rows": {
+                            "type": "array",
+                            "items": {"type": "array"},
+                            "description": "Rows to insert, each an array of values in column order",
+                        },
+                        "csv": {
+                            "type": "string",
+                            "description": "Rows as CSV text instead of rows; the first line is the header unless columns is given",
+                        },
+                        "chunk_size": {
+                            "type": "integer",
+                            "description": f"Rows per executemany batch (default {DEFAULT_BULK_CHUNK_SIZE})",
+                            "minimum": 1,
+                        },
+                    },
+                    "required": ["table"],
+                },
+            ),
+            types.Tool(
+                name="import_file",
+                description="Stream a local CSV or JSONL file into a table, creating the table with inferred column types if needed",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "path": {"type": "string", "description": "File path, relative to the server's data directory"},
+                        "table": {"type": "string", "description": "Name of the table to load into"},
+                        "format": {
+                            "type": "string",
+                            "enum": list(FILE_FORMATS),
+                            "description": "File format; taken from the file extension by default",
+                        },
+                        "create": {
+                            "type": "boolean",
+                            "description": "Create the table if it does not exist (default true)",
+                        },
+                        "chunk_size": {
+                            "type": "integer",
+                            "description": f"Rows per executemany batch (default {DEFAULT_BULK_CHUNK_SIZE})",
+                            "minimum": 1,
+                        },
+                    },
+                    "required": ["path", "table"],
+                },
+            ),
+            types.Tool(
+                name="export_query",
+                description="Stream the result of a SELECT query to a local CSV or JSONL file instead of returning it",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "query": {"type": "string", "description": "SELECT SQL query to export"},
+                        "path": {"type": "string", "description": "File path, relative to the server's data directory"},
+                        "params": {
+                            "type": ["array", "object"],
+                            "description": "Values for ? or :name placeholders in the query",
+                        },
+                        "format": {
+                            "type": "string",
+                            "enum": list(FILE_FORMATS),
+                            "description": "File format; taken from the file extension by default",
+                        },
+                        "overwrite": {
+                            "type": "boolean",
+                            "description": "Replace the file if it already exists (default false)",
+                        },
+                    },
+                    "required": ["query", "path"],
+                },
+            ),
+            types.Tool(
+                name="execute_batch",
+                description="Execute several INSERT, UPDATE, DELETE or DDL statements atomically in one transaction",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "statements": {
+                            "type": "array",
+                            "description": "Statements to run in order",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "query": {"type": "string", "description": "SQL statement to execute"},
+                                    "params": {
+                                        "type": ["array", "object"],
+                                        "description": "Values for ? (array) or :name (object) placeholders",
+                                    },
+                                },
+                                "required": ["query"],
+                            },
+                        },
+                        "on_error": {
+                            "type": "string",
+                            "enum": ["rollback", "continue"],
+                            "description": "rollback the whole batch on the first error (default), or undo only the failing statement and continue",
+                        },
+                    },
+                    "required": ["statements"],
+                },
+            ),
             types.Tool(
                 name="list_tables",
                 description="List all tables in the SQLite database",
@@ -294,6 +2708,145 @@ async def main(db_path: str):
                     "required": ["table_name"],
                 },
             ),
+            types.Tool(
+                name="describe_schema",
+                description="Get every table and view with its columns, indexes, foreign keys and estimated row count in one call",
+                inputSchema={
+                    "type": "object",
+                    "properties": {},
+                },
+            ),
+            types.Tool(
+                name="explain_query",
+                description="Show the query plan for a SQL statement, marking full table SCANs and indexed SEARCHes with an estimated cost",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "query": {"type": "string", "description": "SQL statement to explain; it is not executed"},
+                        "params": {
+                            "type": ["array", "object"],
+                            "description": "Values for ? (array) or :name (object) placeholders in the query",
+                        },
+                    },
+                    "required": ["query"],
+                },
+            ),
+            types.Tool(
+                name="suggest_indexes",
+                description="Suggest indexes that would turn full table scans into index searches, for one query or for the recorded slow queries",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "query": {"type": "string", "description": "Query to analyze; defaults to the recorded slow queries"},
+                        "create": {"type": "boolean", "description": "Create the suggested indexes (default false)"},
+                    },
+                },
+            ),
+            types.Tool(
+                name="create_materialized_view",
+                description="Store the result of a SELECT query, typically a GROUP BY rollup, in a new table that refresh_view keeps up to date. Single-table GROUP BY queries over COUNT, SUM, TOTAL, MIN and MAX refresh incrementally",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string", "description": "Name of the table to store the view in"},
+                        "query": {"type": "string", "description": "SELECT SQL query defining the view"},
+                    },
+                    "required": ["name", "query"],
+                },
+            ),
+            types.Tool(
+                name="refresh_view",
+                description="Bring a materialized view, or all of them, up to date with their source tables",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string", "description": "View to refresh; defaults to every materialized view"},
+                        "full": {"type": "boolean", "description": "Recompute from scratch instead of merging new rows (default false)"},
+                    },
+                },
+            ),
+            types.Tool(
+                name="create_fts_index",
+                description="Build an FTS5 full-text index over text columns of a table, kept in sync by triggers, so search_text can replace LIKE '%term%' scans",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "table": {"type": "string", "description": "Table to index"},
+                        "columns": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Text columns to index",
+                        },
+                        "tokenize": {
+                            "type": "string",
+                            "description": "FTS5 tokenizer, e.g. 'porter unicode61' to match word stems (default unicode61)",
+                        },
+                    },
+                    "required": ["table", "columns"],
+                },
+            ),
+            types.Tool(
+                name="search_text",
+                description="Full-text search over a table indexed with create_fts_index, returning the best matches first with a highlighted snippet",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "table": {"type": "string", "description": "Table to search"},
+                        "query": {"type": "string", "description": "Words that must all appear in a matching row"},
+                        "advanced": {
+                            "type": "boolean",
+                            "description": "Treat query as FTS5 syntax with OR, NOT, \"phrases\", prefix* and column: filters (default false)",
+                        },
+                        "columns": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Columns of the table to return with each match (default all)",
+                        },
+                        "page_size": {
+                            "type": "integer",
+                            "description": f"Maximum number of matches to return (default {DEFAULT_PAGE_SIZE})",
+                            "minimum": 1,
+                        },
+                        "cursor": {
+                            "type": "string",
+                            "description": "Cursor returned by a previous call with the same search, to fetch the next page",
+                        },
+                        "output_format": {
+                            "type": "string",
+                            "enum": list(OUTPUT_FORMATS),
+                            "description": "records (list of objects, default), columnar, csv or jsonl",
+                        },
+                    },
+                    "required": ["table", "query"],
+                },
+            ),
+            types.Tool(
+                name="sample_query",
+                description="Estimate COUNT, and SUM and AVG of numeric columns, optionally per group, from a random sample of a large table instead of scanning it. Estimates come with standard errors and 95% confidence intervals",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "table": {"type": "string", "description": "Table to estimate over"},
+                        "columns": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Numeric columns to estimate SUM and AVG of",
+                        },
+                        "where": {"type": "string", "description": "SQL condition on the table's columns to filter rows by"},
+                        "group_by": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Columns to group the estimates by",
+                        },
+                        "rate": {
+                            "type": "number",
+                            "description": f"Fraction of rows to sample, between 0 and 1 (default {DEFAULT_SAMPLE_RATE}, or the rate of the existing sample)",
+                        },
+                        "resample": {"type": "boolean", "description": "Draw a fresh sample, e.g. after bulk updates or deletes (default false)"},
+                    },
+                    "required": ["table"],
+                },
+            ),
             types.Tool(
                 name="append_insight",
                 description="Add a business insight to the memo",
@@ -305,83 +2858,288 @@ async def main(db_path: str):
                     "required": ["insight"],
                 },
             ),
+            types.Tool(
+                name="attach_database",
+                description="Open another SQLite database file under an alias; it can then be targeted with the database argument of every tool, or joined from the main database as alias.table",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "alias": {"type": "string", "description": "Name to refer to the database by"},
+                        "path": {"type": "string", "description": "Path to the database file, relative to the data directory; it is created if missing"},
+                        "profile": {
+                            "type": "string",
+                            "enum": sorted(PRAGMA_PROFILES),
+                            "description": "PRAGMA profile for the database's connections (default: same as the main database)",
+                        },
+                        "read_only": {"type": "boolean", "description": "Open the database as an immutable snapshot (default false)"},
+                    },
+                    "required": ["alias", "path"],
+                },
+            ),
+            types.Tool(
+                name="list_databases",
+                description="List the databases served by this server with their paths and settings",
+                inputSchema={
+                    "type": "object",
+                    "properties": {},
+                },
+            ),
         ]
+        for tool in tools:
+            if tool.name not in SERVER_TOOLS:
+                tool.inputSchema["properties"]["database"] = {
+                    "type": "string",
+                    "description": f"Alias of the database to use (default {MAIN_DATABASE})",
+                }
+        if db.read_only:
+            return [tool for tool in tools if tool.name not in WRITE_TOOLS]
+        return tools
 
-    @server.call_tool()
-    async def handle_call_tool(
+    async def call_tool(
         name: str, arguments: dict[str, Any] | None
     ) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-        """Handle tool execution requests"""
-        try:
-            if name == "list_tables":
-                results = db._execute_query(
-                    "SELECT name FROM sqlite_master WHERE type='table'"
-                )
-                return [types.TextContent(type="text", text=str(results))]
+        """Dispatch a tool call; errors are turned into error text by handle_call_tool"""
+        if name == "list_databases":
+            return [types.TextContent(type="text", text=json.dumps(databases.describe()))]
 
-            elif name == "describe_table":
-                if not arguments or "table_name" not in arguments:
-                    raise ValueError("Missing table_name argument")
-                results = db._execute_query(
-                    f"PRAGMA table_info({arguments['table_name']})"
-                )
-                return [types.TextContent(type="text", text=str(results))]
+        elif name == "attach_database":
+            if not arguments or "alias" not in arguments or "path" not in arguments:
+                raise ValueError("Missing alias or path argument")
+            await asyncio.to_thread(
+                databases.attach,
+                arguments["alias"],
+                # Unlike --attach, a client may only open databases below the data directory
+                str(databases.main._data_path(arguments["path"])),
+                arguments.get("profile"),
+                arguments.get("read_only", False),
+            )
+            return [types.TextContent(type="text", text=json.dumps(databases.describe()))]
 
-            elif name == "append_insight":
-                if not arguments or "insight" not in arguments:
-                    raise ValueError("Missing insight argument")
+        db = databases.get((arguments or {}).get("database"))
+        if db.read_only and name in WRITE_TOOLS:
+            raise ValueError(f"{name} is not available in read-only mode")
 
-                db.insights.append(arguments["insight"])
-                _ = db._synthesize_memo()
+        if name == "list_tables":
+            catalog = await db.describe_schema()
+            results = [{"name": name} for name, info in catalog.items() if info["type"] == "table"]
+            return [types.TextContent(type="text", text=str(results))]
 
-                # Notify clients that the memo resource has changed
-                await server.request_context.session.send_resource_updated(AnyUrl("memo://insights"))
+        elif name == "describe_table":
+            if not arguments or "table_name" not in arguments:
+                raise ValueError("Missing table_name argument")
+            catalog = await db.describe_schema()
+            info = find_schema_object(catalog, arguments["table_name"])
+            results = info["columns"] if info else []
+            return [types.TextContent(type="text", text=str(results))]
 
-                return [types.TextContent(type="text", text="Insight added to memo")]
+        elif name == "describe_schema":
+            catalog = await db.describe_schema(row_counts=True)
+            return [types.TextContent(type="text", text=json.dumps(catalog))]
 
-            if not arguments:
-                raise ValueError("Missing arguments")
+        elif name == "suggest_indexes":
+            suggestions = await db.suggest_indexes((arguments or {}).get("query"), (arguments or {}).get("create", False))
+            return [types.TextContent(type="text", text=json.dumps(suggestions))]
 
-            if name == "read_query":
-                if not arguments["query"].strip().upper().startswith("SELECT"):
-                    raise ValueError("Only SELECT queries are allowed for read_query")
-                results = db._execute_query(arguments["query"])
-                return [types.TextContent(type="text", text=str(results))]
+        elif name == "refresh_view":
+            results = await db.refresh_view((arguments or {}).get("name"), (arguments or {}).get("full", False))
+            return [types.TextContent(type="text", text=json.dumps(results))]
+
+        elif name == "append_insight":
+            if not arguments or "insight" not in arguments:
+                raise ValueError("Missing insight argument")
+
+            await asyncio.to_thread(databases.main.insights.append, arguments["insight"])
+
+            # Notify clients that the memo resource has changed
+            await server.request_context.session.send_resource_updated(AnyUrl("memo://insights"))
+
+            return [types.TextContent(type="text", text="Insight added to memo")]
+
+        if not arguments:
+            raise ValueError("Missing arguments")
+
+        if name == "read_query":
+            if statement_keywords(arguments["query"])[:1] != ("SELECT",):
+                raise ValueError("Only SELECT queries are allowed for read_query")
+            page, next_cursor = await db.read_page(
+                arguments["query"],
+                arguments.get("params"),
+                page_size=arguments.get("page_size", DEFAULT_PAGE_SIZE),
+                cursor=arguments.get("cursor"),
+                output_format=arguments.get("output_format", "records"),
+            )
+            content = [types.TextContent(type="text", text=page)]
+            if next_cursor is not None:
+                content.append(types.TextContent(
+                    type="text",
+                    text=f"More rows available. Call read_query again with cursor=\"{next_cursor}\" to fetch the next page.",
+                ))
+            return content
 
-            elif name == "write_query":
-                if arguments["query"].strip().upper().startswith("SELECT"):
-                    raise ValueError("SELECT queries are not allowed for write_query")
-                results = db._execute_query(arguments["query"])
-                return [types.TextContent(type="text", text=str(results))]
+        elif name == "write_query":
+            if statement_keywords(arguments["query"])[:1] == ("SELECT",):
+                raise ValueError("SELECT queries are not allowed for write_query")
+            results = await db.execute(arguments["query"], arguments.get("params"))
+            return [types.TextContent(type="text", text=str(results))]
 
-            elif name == "create_table":
-                if not arguments["query"].strip().upper().startswith("CREATE TABLE"):
-                    raise ValueError("Only CREATE TABLE statements are allowed")
-                db._execute_query(arguments["query"])
-                return [types.TextContent(type="text", text="Table created successfully")]
+        elif name == "create_table":
+            if statement_keywords(arguments["query"]) != ("CREATE", "TABLE"):
+                raise ValueError("Only CREATE TABLE statements are allowed")
+            await db.execute(arguments["query"])
+            return [types.TextContent(type="text", text="Table created successfully")]
 
+        elif name == "bulk_insert":
+            columns = arguments.get("columns")
+            if "csv" in arguments:
+                rows = csv.reader(io.StringIO(arguments["csv"]))
+                if not columns:
+                    columns = next(rows, [])
+            elif "rows" in arguments:
+                rows = arguments["rows"]
             else:
-                raise ValueError(f"Unknown tool: {name}")
+                raise ValueError("Either rows or csv is required")
+            if not columns:
+                raise ValueError("Missing columns argument")
+            inserted = await db.bulk_insert(
+                arguments["table"],
+                columns,
+                rows,
+                arguments.get("chunk_size", DEFAULT_BULK_CHUNK_SIZE),
+            )
+            return [types.TextContent(type="text", text=str([{"inserted_rows": inserted}]))]
+
+        elif name == "import_file":
+            result = await db.import_file(
+                arguments["path"],
+                arguments["table"],
+                arguments.get("format"),
+                arguments.get("create", True),
+                arguments.get("chunk_size", DEFAULT_BULK_CHUNK_SIZE),
+            )
+            return [types.TextContent(type="text", text=json.dumps(result))]
+
+        elif name == "export_query":
+            result = await db.export_query(
+                arguments["query"],
+                arguments["path"],
+                arguments.get("params"),
+                arguments.get("format"),
+                arguments.get("overwrite", False),
+            )
+            return [types.TextContent(type="text", text=json.dumps(result))]
+
+        elif name == "create_materialized_view":
+            result = await db.create_materialized_view(arguments["name"], arguments["query"])
+            return [types.TextContent(type="text", text=json.dumps(result))]
 
+        elif name == "create_fts_index":
+            result = await db.create_fts_index(arguments["table"], arguments["columns"], arguments.get("tokenize"))
+            return [types.TextContent(type="text", text=json.dumps(result))]
+
+        elif name == "search_text":
+            page, next_cursor = await db.search_text(
+                arguments["table"],
+                arguments["query"],
+                arguments.get("columns"),
+                arguments.get("advanced", False),
+                page_size=arguments.get("page_size", DEFAULT_PAGE_SIZE),
+                cursor=arguments.get("cursor"),
+                output_format=arguments.get("output_format", "records"),
+            )
+            content = [types.TextContent(type="text", text=page)]
+            if next_cursor is not None:
+                content.append(types.TextContent(
+                    type="text",
+                    text=f"More matches available. Call search_text again with cursor=\"{next_cursor}\" to fetch the next page.",
+                ))
+            return content
+
+        elif name == "sample_query":
+            result = await db.sample_query(
+                arguments["table"],
+                arguments.get("columns"),
+                arguments.get("where"),
+                arguments.get("group_by"),
+                arguments.get("rate"),
+                arguments.get("resample", False),
+            )
+            return [types.TextContent(type="text", text=json.dumps(result))]
+
+        elif name == "explain_query":
+            plan = await db.explain_query(arguments["query"], arguments.get("params"))
+            return [types.TextContent(type="text", text=json.dumps(plan))]
+
+        elif name == "execute_batch":
+            results = await db.execute_batch(arguments["statements"], arguments.get("on_error", "rollback"))
+            return [types.TextContent(type="text", text=str(results))]
+
+        else:
+            raise ValueError(f"Unknown tool: {name}")
+
+    @server.call_tool()
+    async def handle_call_tool(
+        name: str, arguments: dict[str, Any] | None
+    ) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+        """Handle tool execution requests, recording latency and response size per tool"""
+        started = time.perf_counter()
+        failed = True
+        try:
+            target = databases.get((arguments or {}).get("database"))
+        except ValueError:
+            target = db
+        try:
+            content = await call_tool(name, arguments)
+            failed = False
         except sqlite3.Error as e:
-            return [types.TextContent(type="text", text=f"Database error: {str(e)}")]
+            content = [types.TextContent(type="text", text=f"Database error: {str(e)}")]
         except Exception as e:
-            return [types.TextContent(type="text", text=f"Error: {str(e)}")]
-
-    async with stdio_server() as (read_stream, write_stream):
-        logger.info("Server running with stdio transport")
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="sqlite",
-                server_version="0.1.0",
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
-                ),
-            ),
+            content = [types.TextContent(type="text", text=f"Error: {str(e)}")]
+        target.metrics.record_tool(
+            name,
+            (time.perf_counter() - started) * 1000,
+            size=sum(len(item.text) for item in content if isinstance(item, types.TextContent)),
+            error=failed,
         )
+        return content
+
+    return server
+
+
+async def main(
+    db_path: str,
+    attach: dict[str, str] | None = None,
+    attach_profiles: dict[str, str] | None = None,
+    **db_options: Any,
+):
+    """Run the server over stdio.
+
+    `attach` maps aliases to further database files to serve, each opened with the PRAGMA profile
+    named in `attach_profiles` or else the main database's PRAGMAs. `db_options` are passed
+    through to every SqliteDatabase.
+    """
+    logger.info(f"Starting SQLite MCP Server with DB path: {db_path}")
+
+    databases = DatabaseRegistry(SqliteDatabase(db_path, **db_options), **db_options)
+    try:
+        for alias, path in (attach or {}).items():
+            databases.attach(alias, path, (attach_profiles or {}).get(alias))
+        server = create_server(databases)
+        async with stdio_server() as (read_stream, write_stream):
+            logger.info("Server running with stdio transport")
+            await server.run(
+                read_stream,
+                write_stream,
+                InitializationOptions(
+                    server_name="sqlite",
+                    server_version="0.1.0",
+                    capabilities=server.get_capabilities(
+                        notification_options=NotificationOptions(),
+                        experimental_capabilities={},
+                    ),
+                ),
+            )
+    finally:
+        databases.close()
 
 class ServerWrapper():
     """A wrapper to compat with mcp[cli]"""
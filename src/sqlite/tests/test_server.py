@@ -0,0 +1,702 @@
+import asyncio
+import json
+import sqlite3
+import threading
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from mcp_server_sqlite.server import (
+    MEMO_INSIGHTS,
+    ConnectionPool,
+    bernoulli_estimates,
+    DatabaseRegistry,
+    SqliteDatabase,
+    create_server,
+    is_write_statement,
+    normalize_query,
+    null_params,
+    parse_aggregate_view,
+    resolve_pragmas,
+    statement_keywords,
+    suggest_index,
+)
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = SqliteDatabase(str(tmp_path / "test.db"), pool_size=2)
+    database._execute_query("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    database._execute_query("INSERT INTO items (name) VALUES ('a'), ('b')")
+    yield database
+    database.close()
+
+
+def test_execute_query_reads_and_writes(db):
+    assert db._execute_query("UPDATE items SET name = 'c' WHERE id = 1") == [{"affected_rows": 1}]
+    assert db._execute_query("SELECT name FROM items ORDER BY id") == [{"name": "c"}, {"name": "b"}]
+
+
+def test_transaction_control_does_not_lock_out_later_writes(db):
+    db._execute_query("BEGIN IMMEDIATE")
+    assert db._execute_query("INSERT INTO items (name) VALUES ('c')") == [{"affected_rows": 1}]
+    assert db._execute_query("SELECT count(*) AS c FROM items") == [{"c": 3}]
+
+
+def test_reader_connections_are_reused(db):
+    with db.pool.reader() as first:
+        pass
+    with db.pool.reader() as second:
+        pass
+    assert first is second
+
+
+def test_pool_bounds_concurrent_readers(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), size=2)
+    seen = set()
+    barrier = threading.Barrier(2)
+
+    def borrow():
+        with pool.reader() as conn:
+            seen.add(id(conn))
+            barrier.wait(timeout=5)
+
+    threads = [threading.Thread(target=borrow) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(seen) == 2
+    with pool.reader():
+        pass
+    assert len(pool._readers) == 2
+    pool.close()
+
+
+def test_pragmas_are_applied_on_open(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pragma.db"), pragmas={"cache_size": -4096})
+    with pool.reader() as conn:
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -4096
+    pool.close()
+
+
+def test_closed_pool_rejects_connections(db):
+    db.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        db._execute_query("SELECT 1")
+
+
+def test_read_only_database_serves_reads_and_rejects_writes(db):
+    db.close()
+    replica = SqliteDatabase(db.db_path, read_only=True)
+    try:
+        assert replica._execute_query("SELECT name FROM items ORDER BY id") == [{"name": "a"}, {"name": "b"}]
+        with replica.pool.reader() as conn:
+            assert conn.execute("PRAGMA mmap_size").fetchone()[0] > 0
+        with pytest.raises(sqlite3.OperationalError):
+            replica._execute_query("DELETE FROM items")
+        with pytest.raises(ValueError):
+            replica._suggest_indexes("SELECT * FROM items WHERE name = 'a'", create=True)
+    finally:
+        replica.close()
+
+
+def test_read_only_database_must_exist(tmp_path):
+    with pytest.raises(sqlite3.OperationalError):
+        SqliteDatabase(str(tmp_path / "missing.db"), read_only=True)
+
+
+def test_insights_persist_and_page(db):
+    assert db.insights.memo() == "No business insights have been discovered yet."
+    for n in range(MEMO_INSIGHTS + 5):
+        db.insights.append(f"insight {n}")
+    memo = db.insights.memo()
+    assert db.insights.memo() is memo
+    assert "- insight 4\n" not in memo and "- insight 5\n" in memo
+    assert f"revealed {MEMO_INSIGHTS + 5} key business insights" in memo
+
+    db.close()
+    reopened = SqliteDatabase(db.db_path)
+    try:
+        assert reopened.insights.memo() == memo
+        page, since = reopened.insights.page(0, 3)
+        assert page == [(1, "insight 0"), (2, "insight 1"), (3, "insight 2")] and since == 3
+        page, since = reopened.insights.page(MEMO_INSIGHTS + 3, 3)
+        assert [text for _, text in page] == [f"insight {MEMO_INSIGHTS + 3}", f"insight {MEMO_INSIGHTS + 4}"]
+        assert since is None
+    finally:
+        reopened.close()
+
+
+def test_read_only_insights_stay_in_memory(db):
+    db.insights.append("saved")
+    db.close()
+    replica = SqliteDatabase(db.db_path, read_only=True)
+    try:
+        assert replica.insights.append("unsaved") == 2
+        assert replica.insights.page() == ([(1, "saved"), (2, "unsaved")], None)
+    finally:
+        replica.close()
+
+
+SLOW_QUERY = (
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000) "
+    "SELECT count(*) FROM n"
+)
+
+
+def test_execute_runs_off_the_event_loop(db):
+    async def scenario():
+        return await asyncio.gather(*(db.execute("SELECT count(*) AS n FROM items") for _ in range(4)))
+
+    assert asyncio.run(scenario()) == [[{"n": 2}]] * 4
+
+
+def test_query_timeout_interrupts_statement(db):
+    db.query_timeout = 0.2
+
+    async def scenario():
+        with pytest.raises(TimeoutError):
+            await db.execute(SLOW_QUERY)
+        return await db.execute("SELECT name FROM items WHERE id = 1")
+
+    assert asyncio.run(scenario()) == [{"name": "a"}]
+
+
+def test_cancellation_interrupts_statement(db):
+    handles = []
+    original = db._run_tracked
+
+    def spy(handle, func, *args):
+        handles.append(handle)
+        return original(handle, func, *args)
+
+    db._run_tracked = spy
+
+    async def scenario():
+        task = asyncio.create_task(db.execute(SLOW_QUERY))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert handles[0].interrupted
+
+
+def test_default_profile_enables_wal(db):
+    with db.pool.reader() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+
+def test_resolve_pragmas_applies_overrides():
+    pragmas = resolve_pragmas("read-heavy", {"mmap_size": 0, "synchronous": None})
+    assert pragmas["mmap_size"] == 0
+    assert pragmas["synchronous"] == "NORMAL"
+    with pytest.raises(ValueError):
+        resolve_pragmas("unknown")
+
+
+@pytest.fixture
+def big_db(tmp_path):
+    database = SqliteDatabase(str(tmp_path / "big.db"), pool_size=2)
+    with database.pool.writer() as conn:
+        conn.execute("CREATE TABLE numbers (n INTEGER)")
+        conn.executemany("INSERT INTO numbers VALUES (?)", ((i,) for i in range(25)))
+        conn.commit()
+    yield database
+    database.close()
+
+
+def test_read_page_paginates_with_cursor(big_db):
+    query = "SELECT n FROM numbers ORDER BY n"
+    seen = []
+    page, cursor = big_db._read_page(query, page_size=10, output_format="columnar")
+    seen.extend(json.loads(page)["rows"])
+    while cursor is not None:
+        page, cursor = big_db._read_page(query, page_size=10, cursor=cursor, output_format="columnar")
+        seen.extend(json.loads(page)["rows"])
+    assert seen == [[i] for i in range(25)]
+    assert len(big_db.cursors) == 0
+
+
+def test_read_page_respects_byte_budget(big_db):
+    big_db.max_result_bytes = 40
+    page, cursor = big_db._read_page("SELECT n FROM numbers ORDER BY n", page_size=100, output_format="jsonl")
+    assert 1 <= len(page.splitlines()) < 25
+    assert cursor is not None
+
+
+def test_read_page_rejects_unknown_or_mismatched_cursor(big_db):
+    with pytest.raises(ValueError):
+        big_db._read_page("SELECT n FROM numbers", cursor="missing")
+    _, cursor = big_db._read_page("SELECT n FROM numbers", page_size=1)
+    with pytest.raises(ValueError):
+        big_db._read_page("SELECT n FROM numbers WHERE n > 1", cursor=cursor)
+    assert len(big_db.cursors) == 0
+
+
+def test_read_page_rejects_cursor_with_different_params(big_db):
+    query = "SELECT n FROM numbers WHERE n > ?"
+    _, cursor = big_db._read_page(query, [1], page_size=1)
+    with pytest.raises(ValueError):
+        big_db._read_page(query, [20], cursor=cursor)
+    assert len(big_db.cursors) == 0
+
+
+def test_idle_cursors_are_evicted(big_db):
+    big_db.cursors.idle_timeout = 0
+    _, cursor = big_db._read_page("SELECT n FROM numbers", page_size=1)
+    big_db.cursors.evict_idle()
+    with pytest.raises(ValueError):
+        big_db._read_page("SELECT n FROM numbers", cursor=cursor)
+
+
+def test_open_cursors_never_exhaust_the_pool(big_db):
+    for _ in range(3):
+        big_db._read_page("SELECT n FROM numbers", page_size=1)
+    assert len(big_db.cursors) == 1
+    assert big_db._execute_query("SELECT count(*) AS c FROM numbers") == [{"c": 25}]
+
+
+def test_pool_size_leaves_a_reader_beside_open_cursors(tmp_path):
+    with pytest.raises(ValueError):
+        SqliteDatabase(str(tmp_path / "one.db"), pool_size=1)
+
+
+def test_concurrent_first_pages_do_not_deadlock(big_db):
+    def open_cursors():
+        for _ in range(20):
+            big_db._read_page("SELECT n FROM numbers", page_size=1)
+
+    threads = [threading.Thread(target=open_cursors) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(big_db.cursors) == 1
+
+
+@pytest.mark.parametrize(
+    ("output_format", "expected"),
+    [
+        ("records", "[{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}]"),
+        ("columnar", '{"columns": ["id", "name"], "rows": [[1, "a"], [2, "b"]]}'),
+        ("csv", "id,name\n1,a\n2,b\n"),
+        ("jsonl", '{"id": 1, "name": "a"}\n{"id": 2, "name": "b"}'),
+    ],
+)
+def test_read_page_output_formats(db, output_format, expected):
+    page, cursor = db._read_page("SELECT id, name FROM items ORDER BY id", output_format=output_format)
+    assert page == expected
+    assert cursor is None
+
+
+def test_read_page_rejects_unknown_output_format(db):
+    with pytest.raises(ValueError):
+        db._read_page("SELECT 1", output_format="xml")
+
+
+def test_statement_keywords_skip_comments_and_are_cached():
+    statement_keywords.cache_clear()
+    query = "-- monthly totals\n/* v2 */  select *\nFROM items"
+    assert statement_keywords(query) == ("SELECT", "*")
+    assert statement_keywords(query) == ("SELECT", "*")
+    assert statement_keywords.cache_info().hits == 1
+    assert statement_keywords("create table t (a)") == ("CREATE", "TABLE")
+    assert is_write_statement("  REPLACE INTO t VALUES (1)")
+    assert not is_write_statement("SELECT 1")
+
+
+def test_queries_accept_params(db):
+    assert db._execute_query("INSERT INTO items (name) VALUES (?)", ["c"]) == [{"affected_rows": 1}]
+    page, _ = db._read_page("SELECT id FROM items WHERE name = :name", {"name": "c"}, output_format="csv")
+    assert page == "id\n3\n"
+
+
+def test_bulk_insert_chunks_in_one_transaction(db):
+    rows = ([i, f"name-{i}"] for i in range(10, 35))
+    assert db._bulk_insert("items", ["id", "name"], rows, chunk_size=10) == 25
+    assert db._execute_query("SELECT count(*) AS c FROM items") == [{"c": 27}]
+
+
+def test_bulk_insert_rolls_back_on_error(db):
+    with pytest.raises(ValueError):
+        db._bulk_insert("items", ["id", "name"], [[10, "x"], [11]], chunk_size=1)
+    with pytest.raises(sqlite3.IntegrityError):
+        db._bulk_insert("items", ["id", "name"], [[20, "x"], [1, "duplicate"]])
+    assert db._execute_query("SELECT count(*) AS c FROM items") == [{"c": 2}]
+
+
+def test_import_csv_infers_column_types(db, tmp_path):
+    (tmp_path / "people.csv").write_text("name,age,score,zip\nann,31,9.5,02134\nbob,,7,10001\n")
+    result = db._import_file("people.csv", "people")
+    assert result == {"table": "people", "columns": ["name", "age", "score", "zip"], "inserted_rows": 2, "created": True}
+    assert [column["type"] for column in db._describe_schema()["people"]["columns"]] == ["TEXT", "INTEGER", "REAL", "TEXT"]
+    assert db._execute_query("SELECT * FROM people ORDER BY name") == [
+        {"name": "ann", "age": 31, "score": 9.5, "zip": "02134"},
+        {"name": "bob", "age": None, "score": 7.0, "zip": "10001"},
+    ]
+
+
+def test_export_then_import_jsonl_round_trips(db, tmp_path):
+    assert db._export_query("SELECT id, name FROM items ORDER BY id", "items.jsonl")["rows"] == 2
+    with pytest.raises(ValueError):
+        db._export_query("SELECT id FROM items", "items.jsonl")
+    db._import_file("items.jsonl", "copy")
+    assert db._execute_query("SELECT * FROM copy ORDER BY id") == db._execute_query("SELECT * FROM items ORDER BY id")
+    with pytest.raises(ValueError):
+        db._import_file("items.jsonl", "missing", create=False)
+
+
+def test_file_tools_stay_inside_data_dir(db):
+    with pytest.raises(ValueError):
+        db._export_query("SELECT * FROM items", "../escape.csv")
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["VACUUM INTO '{tmp}/outside.db'", "ATTACH DATABASE '{tmp}/other.db' AS other", "PRAGMA user_version", "BEGIN"],
+)
+def test_export_query_rejects_non_select_statements(db, tmp_path, query):
+    with pytest.raises(ValueError):
+        db._export_query(query.format(tmp=tmp_path), "out.csv")
+    assert not (tmp_path / "outside.db").exists()
+    assert not (tmp_path / "other.db").exists()
+    assert not (tmp_path / "out.csv").exists()
+
+
+def test_execute_batch_commits_atomically(db):
+    results = db._execute_batch([
+        {"query": "INSERT INTO items (name) VALUES (?)", "params": ["c"]},
+        {"query": "UPDATE items SET name = upper(name)"},
+        {"query": "DELETE FROM items WHERE name = :name", "params": {"name": "A"}},
+    ])
+    assert results == [{"affected_rows": 1}, {"affected_rows": 3}, {"affected_rows": 1}]
+    assert db._execute_query("SELECT name FROM items ORDER BY id") == [{"name": "B"}, {"name": "C"}]
+
+
+def test_execute_batch_rolls_back_on_error(db):
+    with pytest.raises(sqlite3.IntegrityError, match="Statement 2 failed"):
+        db._execute_batch([
+            {"query": "INSERT INTO items (name) VALUES ('c')"},
+            {"query": "INSERT INTO items (id, name) VALUES (1, 'duplicate')"},
+        ])
+    assert db._execute_query("SELECT count(*) AS c FROM items") == [{"c": 2}]
+
+
+def test_execute_batch_can_continue_past_errors(db):
+    results = db._execute_batch([
+        {"query": "INSERT INTO items (id, name) VALUES (1, 'duplicate')"},
+        {"query": "INSERT INTO items (name) VALUES ('c')"},
+    ], on_error="continue")
+    assert "UNIQUE constraint failed" in results[0]["error"]
+    assert results[1] == {"affected_rows": 1}
+    assert db._execute_query("SELECT count(*) AS c FROM items") == [{"c": 3}]
+
+
+def test_schema_catalog_is_cached_until_schema_changes(db):
+    first = db._describe_schema()
+    assert db._describe_schema() is first
+    assert [column["name"] for column in first["items"]["columns"]] == ["id", "name"]
+
+    db._execute_query("CREATE INDEX items_name ON items (name)")
+    catalog = db._describe_schema()
+    assert catalog is not first
+    assert catalog["items"]["indexes"] == [{"name": "items_name", "unique": False, "columns": ["name"]}]
+
+
+def test_schema_catalog_notices_external_schema_changes(db):
+    first = db._describe_schema()
+    with sqlite3.connect(db.db_path) as conn:
+        conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, item_id INTEGER REFERENCES items (id))")
+    catalog = db._describe_schema(row_counts=True)
+    assert catalog is not first
+    assert catalog["orders"]["foreign_keys"] == [
+        {"from": "item_id", "table": "items", "to": "id", "on_update": "NO ACTION", "on_delete": "NO ACTION"}
+    ]
+    assert catalog["items"]["row_estimate"] == 2
+    assert catalog["orders"]["row_estimate"] == 0
+
+
+def test_result_cache_serves_repeats_until_data_changes(db):
+    db.result_cache.max_bytes = 1 << 16
+    query = "SELECT name FROM items ORDER BY id"
+    assert db._read_page(query, output_format="csv") == ("name\na\nb\n", None)
+    assert db._read_page(query, output_format="csv") == ("name\na\nb\n", None)
+    assert (db.result_cache.hits, db.result_cache.misses) == (1, 1)
+
+    db._execute_query("INSERT INTO items (name) VALUES ('c')")
+    assert db._read_page(query, output_format="csv") == ("name\na\nb\nc\n", None)
+    with sqlite3.connect(db.db_path) as conn:
+        conn.execute("DELETE FROM items WHERE name = 'a'")
+    assert db._read_page(query, output_format="csv") == ("name\nb\nc\n", None)
+    assert db.result_cache.hits == 1
+
+
+def test_result_cache_evicts_least_recently_used(db):
+    db.result_cache.max_bytes = 20
+    for n in range(4):
+        db._read_page(f"SELECT {n} AS value", output_format="csv")
+    stats = db.result_cache.stats()
+    assert stats["bytes"] <= 20
+    assert stats["evictions"] > 0
+    db._read_page("SELECT 3 AS value", output_format="csv")
+    assert db.result_cache.hits == 1
+
+
+def test_attached_databases_are_routed_and_joinable(db, tmp_path):
+    databases = DatabaseRegistry(db)
+    try:
+        other = databases.attach("sales", str(tmp_path / "sales.db"), pool_size=2)
+        assert databases.get("sales") is other and databases.get() is db
+        other._execute_query("CREATE TABLE orders (item_id INTEGER, qty INTEGER)")
+        other._execute_query("INSERT INTO orders VALUES (1, 5), (2, 7)")
+        assert db._execute_query(
+            "SELECT name, qty FROM items JOIN sales.orders ON orders.item_id = items.id ORDER BY name"
+        ) == [{"name": "a", "qty": 5}, {"name": "b", "qty": 7}]
+
+        db.result_cache.max_bytes = 1 << 16
+        query = "SELECT sum(qty) AS total FROM sales.orders"
+        assert db._read_page(query, output_format="csv")[0] == "total\n12\n"
+        other._execute_query("UPDATE orders SET qty = 1")
+        assert db._read_page(query, output_format="csv")[0] == "total\n2\n"
+
+        for alias in ("main", "sales", "SALES", "bad-name"):
+            with pytest.raises(ValueError):
+                databases.attach(alias, str(tmp_path / "x.db"))
+        with pytest.raises(ValueError):
+            databases.get("missing")
+    finally:
+        databases.close()
+
+
+def test_read_only_attachments_reject_writes_from_main(db, tmp_path):
+    snapshot = sqlite3.connect(tmp_path / "snap.db")
+    snapshot.execute("CREATE TABLE s (n INTEGER)")
+    snapshot.execute("INSERT INTO s VALUES (1)")
+    snapshot.commit()
+    snapshot.close()
+    databases = DatabaseRegistry(db)
+    try:
+        databases.attach("snap", str(tmp_path / "snap.db"), read_only=True)
+        with pytest.raises(sqlite3.OperationalError):
+            db._execute_query("INSERT INTO snap.s VALUES (2)")
+        assert db._execute_query("SELECT count(*) AS c FROM snap.s") == [{"c": 1}]
+    finally:
+        databases.close()
+
+
+def test_attach_database_tool_stays_inside_data_dir(db, tmp_path):
+    async def call(arguments):
+        async with create_connected_server_and_client_session(create_server(databases)) as session:
+            return await session.call_tool("attach_database", arguments)
+
+    databases = DatabaseRegistry(db)
+    try:
+        escaped = asyncio.run(call({"alias": "outside", "path": "../outside/x.db"}))
+        assert "outside the data directory" in escaped.content[0].text
+        assert not (tmp_path.parent / "outside").exists()
+        attached = asyncio.run(call({"alias": "inside", "path": "inside.db"}))
+        assert "inside" in [entry["name"] for entry in json.loads(attached.content[0].text)]
+        assert databases.get("inside").db_path == str(tmp_path / "inside.db")
+    finally:
+        databases.close()
+
+
+def test_failed_attach_closes_the_new_database(db, tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise sqlite3.OperationalError("unable to open database")
+
+    closed = []
+    monkeypatch.setattr(db.pool, "attach", fail)
+    monkeypatch.setattr(SqliteDatabase, "close", lambda self: closed.append(self.db_path))
+    databases = DatabaseRegistry(db)
+    with pytest.raises(sqlite3.OperationalError):
+        databases.attach("broken", str(tmp_path / "broken.db"))
+    assert closed == [str(tmp_path / "broken.db")]
+    assert "broken" not in dict(databases.items())
+
+
+@pytest.fixture
+def orders_db(tmp_path):
+    database = SqliteDatabase(str(tmp_path / "orders.db"))
+    database._execute_query(
+        "CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER, status TEXT, total REAL)"
+    )
+    database._bulk_insert(
+        "orders", ["customer_id", "status", "total"], ([i % 7, "open" if i % 3 else "closed", i] for i in range(500))
+    )
+    yield database
+    database.close()
+
+
+def test_explain_query_annotates_scans_and_searches(orders_db):
+    scan = orders_db._explain_query("SELECT * FROM orders o WHERE o.status = ?")
+    assert scan["plan"][0]["operation"] == "SCAN"
+    assert scan["plan"][0]["table"] == "orders"
+    assert scan["estimated_cost"] == 500
+
+    search = orders_db._explain_query("SELECT * FROM orders WHERE id = 5")
+    assert search["plan"][0]["operation"] == "SEARCH"
+    assert search["plan"][0]["index"] == "PRIMARY KEY"
+    assert search["estimated_cost"] < scan["estimated_cost"]
+
+
+ROLLUP = (
+    "SELECT status, customer_id, count(*) AS n, sum(total) AS revenue, max(total) AS biggest "
+    "FROM orders WHERE total > 10 GROUP BY status, customer_id"
+)
+
+
+def test_parse_aggregate_view_accepts_only_decomposable_rollups():
+    assert parse_aggregate_view(ROLLUP)["kinds"] == ["key", "key", "count", "sum", "max"]
+    assert parse_aggregate_view("SELECT status, avg(total) FROM orders GROUP BY status") is None
+    assert parse_aggregate_view("SELECT status, max(total) - min(total) FROM orders GROUP BY status") is None
+    assert parse_aggregate_view("SELECT o.status, count(*) FROM orders o JOIN c ON c.id = o.customer_id GROUP BY o.status") is None
+    assert parse_aggregate_view("SELECT count(*) FROM orders GROUP BY status") is None
+
+
+def test_materialized_view_refreshes_incrementally(orders_db):
+    assert orders_db._create_materialized_view("rollup", ROLLUP) == {"name": "rollup", "incremental": True, "rows": 14}
+
+    def in_sync():
+        return orders_db._execute_query("SELECT * FROM rollup ORDER BY 1, 2") == orders_db._execute_query(ROLLUP + " ORDER BY 1, 2")
+
+    assert orders_db._refresh_view("rollup") == [{"name": "rollup", "mode": "unchanged", "changed_rows": 0}]
+
+    orders_db._bulk_insert("orders", ["customer_id", "status", "total"], [[1, "open", 1000], [99, "new", 50], [2, "open", 5]])
+    assert orders_db._refresh_view()[0]["mode"] == "incremental"
+    assert in_sync()
+
+    orders_db._execute_query("DELETE FROM orders WHERE total > 400")
+    assert orders_db._refresh_view("rollup")[0]["mode"] == "full"
+    assert in_sync()
+
+    with pytest.raises(ValueError):
+        orders_db._refresh_view("missing")
+
+
+@pytest.fixture
+def docs_db(tmp_path):
+    database = SqliteDatabase(str(tmp_path / "docs.db"))
+    database._execute_query("CREATE TABLE docs (title TEXT, body TEXT, views INTEGER)")
+    database._bulk_insert("docs", ["title", "body", "views"], [
+        ["Pooling", "Reuse SQLite connections instead of reconnecting", 10],
+        ["Caching", "Cache query results until the database changes", 20],
+        ["Indexes", "An index turns a full scan into a search", 30],
+    ])
+    yield database
+    database.close()
+
+
+def test_fts_index_ranks_matches_and_stays_in_sync(docs_db):
+    assert docs_db._create_fts_index("docs", ["title", "body"])["indexed_rows"] == 3
+    page, _ = docs_db._search_text("docs", "database query", columns=["title"], output_format="jsonl")
+    match = json.loads(page)
+    assert (match["title"], match["snippet"]) == ("Caching", "Cache **query** results until the **database** changes")
+
+    docs_db._execute_query("UPDATE docs SET body = 'A query planner picks an index' WHERE title = 'Indexes'")
+    docs_db._execute_query("DELETE FROM docs WHERE title = 'Caching'")
+    docs_db._execute_query("INSERT INTO docs (title, body) VALUES ('Plans', 'EXPLAIN shows the query plan')")
+    page, cursor = docs_db._search_text("docs", "query", columns=["title"], page_size=1, output_format="jsonl")
+    titles = [json.loads(page)["title"]]
+    while cursor is not None:
+        page, cursor = docs_db._search_text("docs", "query", columns=["title"], page_size=1, cursor=cursor, output_format="jsonl")
+        titles.append(json.loads(page)["title"])
+    assert sorted(titles) == ["Indexes", "Plans"]
+    page, _ = docs_db._search_text("docs", "plan* OR reconnect*", columns=["title"], advanced=True, output_format="columnar")
+    assert sorted(row[0] for row in json.loads(page)["rows"]) == ["Indexes", "Plans", "Pooling"]
+
+
+def test_search_text_requires_an_index(docs_db):
+    with pytest.raises(ValueError):
+        docs_db._search_text("docs", "query")
+
+
+def test_schema_catalog_hides_internal_tables(docs_db):
+    docs_db._create_fts_index("docs", ["title", "body"])
+    docs_db.insights.append("saved")
+    assert sorted(docs_db._describe_schema()) == ["docs", "docs_fts"]
+    with docs_db.pool.reader() as conn:
+        assert {"_mcp_insights", "docs_fts_data", "docs_fts_idx"} <= set(docs_db.schema.get(conn))
+
+
+def test_bernoulli_estimates_scale_by_the_sampling_rate():
+    estimates = bernoulli_estimates(0.5, 4, {"x": (4, 10.0, 30.0)})
+    assert estimates["count"]["estimate"] == 8
+    assert estimates["count"]["standard_error"] == pytest.approx(2 ** 0.5 * 2)
+    assert estimates["sum"]["x"]["estimate"] == 20
+    assert estimates["avg"]["x"]["estimate"] == 2.5
+    assert bernoulli_estimates(1.0, 3, {})["count"] == {"estimate": 3, "standard_error": 0.0, "ci95": [3, 3]}
+
+
+def test_sample_query_estimates_from_a_topped_up_sample(orders_db):
+    exact = orders_db._sample_query("orders", ["total"], where="total >= 100", group_by=["status"], rate=1)
+    assert not exact["approximate"]
+    assert {group["group"]["status"]: group["count"]["estimate"] for group in exact["groups"]} == {"open": 267, "closed": 133}
+    assert exact["groups"][0]["sum"]["total"]["standard_error"] == 0
+
+    orders_db._bulk_insert("orders", ["customer_id", "status", "total"], [[1, "open", 1000]] * 10)
+    topped_up = orders_db._sample_query("orders")
+    assert topped_up["rate"] == 1 and topped_up["groups"][0]["count"]["estimate"] == 510
+
+    estimate = orders_db._sample_query("orders", ["total"], rate=0.5)["groups"][0]
+    low, high = estimate["count"]["ci95"]
+    assert 0 < estimate["sample_rows"] < 510 and low < estimate["count"]["estimate"] < high
+    with pytest.raises(ValueError):
+        orders_db._sample_query("orders", ["missing"])
+
+
+def test_suggest_index_orders_equality_range_then_sort_columns():
+    columns = ["id", "customer_id", "status", "total"]
+    query = "SELECT o.id FROM orders AS o WHERE o.total > 10 AND status = 'it''s = open' ORDER BY customer_id"
+    assert suggest_index(query, "orders", columns) == ["status", "total", "customer_id", "id"]
+    assert suggest_index("SELECT * FROM orders", "orders", columns) == []
+
+
+def test_null_params_bind_every_placeholder():
+    assert null_params("SELECT ? , '?' FROM t WHERE a = ?") == [None, None]
+    assert null_params("SELECT * FROM t WHERE a = :a AND b = @b") == {"a": None, "b": None}
+
+
+def test_suggest_indexes_from_slow_queries_and_create(orders_db):
+    orders_db.slow_queries.threshold_ms = 0
+    orders_db._read_page("SELECT total FROM orders WHERE customer_id = ?", [3])
+    suggestions = orders_db._suggest_indexes(create=True)
+    assert [suggestion["columns"] for suggestion in suggestions] == [["customer_id", "total"]]
+    assert suggestions[0]["estimated_cost_after"] < suggestions[0]["estimated_cost"]
+    assert orders_db._describe_schema()["orders"]["indexes"][0]["columns"] == ["customer_id", "total"]
+    assert orders_db._suggest_indexes() == []
+
+
+def test_normalize_query_replaces_literals():
+    assert normalize_query("SELECT *  FROM t\nWHERE a = 'x' AND b > 1.5 AND c = -3;") == (
+        "SELECT * FROM t WHERE a = ? AND b > ? AND c = ?"
+    )
+    assert normalize_query("SELECT col1 FROM t2") == "SELECT col1 FROM t2"
+
+
+def test_metrics_aggregate_queries_by_shape(big_db):
+    big_db._read_page("SELECT n FROM numbers WHERE n < 10")
+    big_db._read_page("SELECT n FROM numbers WHERE n < 20")
+    big_db._execute_query("UPDATE numbers SET n = n WHERE n < 5")
+    queries = {entry["query"]: entry for entry in big_db.metrics.snapshot()["queries"]}
+    select = queries["SELECT n FROM numbers WHERE n < ?"]
+    assert select["count"] == 2
+    assert select["rows"] == 30
+    assert select["row_counts"]["<=10"] == 1
+    assert select["row_counts"]["<=100"] == 1
+    assert queries["UPDATE numbers SET n = n WHERE n < ?"]["rows"] == 5
+
+
+def test_slow_queries_are_logged(big_db, caplog):
+    big_db.slow_queries.threshold_ms = 0
+    with caplog.at_level("WARNING", logger="mcp_sqlite_server.slow_queries"):
+        big_db._execute_query("SELECT count(*) FROM numbers WHERE n > ?", [3])
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["query"] == "SELECT count(*) FROM numbers WHERE n > ?"
+    assert record["params"] == [3]
+    assert big_db.slow_queries.entries()[0]["count"] == 1